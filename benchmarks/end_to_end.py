@@ -0,0 +1,242 @@
+"""Run both research workflows end to end against fake providers.
+
+graph.py (through ``OpenDeepResearch``, as the agent runs it) and
+multi_agent.py are driven by the deterministic chat model and search
+backend from ``fake_providers.py``, so a run costs no API calls and does not
+depend on the network. Latency, jitter and failure rates of both providers
+are configurable.
+
+Reports end-to-end latency, time per graph node, LLM and search calls,
+prompt-token volume and the concurrency achieved. ``--update-baseline``
+stores the results as a JSON baseline; ``--check`` compares a run with it
+and exits non-zero when a workflow got slower or more expensive.
+
+Usage:
+    uv run python benchmarks/end_to_end.py [--workflow graph] [--reports 8] [--concurrency 4]
+    uv run python benchmarks/end_to_end.py --update-baseline
+    uv run python benchmarks/end_to_end.py --check
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import statistics
+import contextlib
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault("LINKUP_API_KEY", "benchmark")
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+os.environ.setdefault("CORAL_ORCHESTRATION_RUNTIME", "benchmark")
+# Measure the research itself: no report cache, no durable checkpoints
+os.environ["REPORT_CACHE"] = "false"
+os.environ.pop("RESEARCH_CHECKPOINT_DB", None)
+
+import odr
+from open_deep_research import graph, multi_agent
+from open_deep_research.metrics import NODE_SECONDS
+
+from fake_providers import CallStats, FakeChatModel, FakeSearch, Latency, PrefixCache, install
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "end_to_end.json")
+
+WORKFLOWS = {
+    "graph": list(graph.builder.nodes) + list(graph.section_builder.nodes),
+    "multi_agent": list(multi_agent.supervisor_builder.nodes) + list(multi_agent.research_builder.nodes),
+}
+
+# Relative increase of each figure that counts as a regression
+CHECKS = {
+    ("report_seconds", "median"): "latency_tolerance",
+    ("report_seconds", "p95"): "latency_tolerance",
+    ("llm", "calls"): "cost_tolerance",
+    ("llm", "input_tokens"): "cost_tolerance",
+    ("search", "calls"): "cost_tolerance",
+}
+
+def node_totals(nodes: list) -> dict:
+    return {node: (NODE_SECONDS.count(node=node), NODE_SECONDS.sum(node=node)) for node in nodes}
+
+async def research(workflow: str, topic: str):
+    if workflow == "graph":
+        return await odr.OpenDeepResearch().generate_research_report(topic, use_cache=False)
+    config = {"configurable": {"search_api": "tavily", "supervisor_model": "fake", "researcher_model": "fake"}}
+    state = await multi_agent.graph.ainvoke({"messages": [{"role": "user", "content": topic}]}, config)
+    return state["final_report"]
+
+async def run_workflow(workflow: str, args) -> dict:
+    rng = random.Random(args.seed)
+    llm_stats, search_stats = CallStats(), CallStats()
+    model = FakeChatModel(latency=Latency(args.llm_latency, args.llm_jitter, args.llm_failure_rate, args.llm_seconds_per_token),
+                          stats=llm_stats, rng=rng, sections=args.sections, queries=args.queries,
+                          response_words=args.response_words, fail_grade_rate=args.fail_grade_rate,
+                          prefix_cache=PrefixCache())
+    search = FakeSearch(Latency(args.search_latency, args.search_jitter, args.search_failure_rate), search_stats, rng,
+                        results_per_query=args.results_per_query, source_chars=args.source_chars)
+    install(model, search)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    in_flight = peak = 0
+
+    async def one(i: int):
+        nonlocal in_flight, peak
+        async with semaphore:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            started = time.perf_counter()
+            try:
+                await research(workflow, f"Benchmark topic {i} for {workflow}")
+                return time.perf_counter() - started, None
+            except Exception as e:
+                return time.perf_counter() - started, e
+            finally:
+                in_flight -= 1
+
+    nodes_before = node_totals(WORKFLOWS[workflow])
+    started = time.perf_counter()
+    # graph.py prints every search query
+    with contextlib.redirect_stdout(io.StringIO()):
+        outcomes = await asyncio.gather(*(one(i) for i in range(args.reports)))
+    wall = time.perf_counter() - started
+    nodes_after = node_totals(WORKFLOWS[workflow])
+
+    durations = sorted(d for d, error in outcomes if error is None)
+    errors = [error for _, error in outcomes if error is not None]
+    nodes = {}
+    for node, (count, total) in nodes_after.items():
+        runs, seconds = count - nodes_before[node][0], total - nodes_before[node][1]
+        if runs:
+            nodes[node] = {"runs": runs, "total_seconds": round(seconds, 4), "mean_ms": round(seconds / runs * 1000, 2)}
+    return {
+        "workflow": workflow,
+        "reports": args.reports,
+        "failed": len(errors),
+        "errors": sorted({f"{type(e).__name__}: {e}" for e in errors})[:5],
+        "wall_seconds": round(wall, 4),
+        "report_seconds": {
+            "median": round(statistics.median(durations), 4) if durations else None,
+            "p95": round(durations[max(0, math.ceil(len(durations) * 0.95) - 1)], 4) if durations else None,
+            "max": round(durations[-1], 4) if durations else None,
+        },
+        "reports_peak_concurrency": peak,
+        "nodes": nodes,
+        "llm": llm_stats.summary(wall),
+        "search": search_stats.summary(wall),
+    }
+
+def params(args) -> dict:
+    return {name: getattr(args, name) for name in (
+        "reports", "concurrency", "seed", "sections", "queries", "response_words", "results_per_query", "source_chars",
+        "llm_latency", "llm_jitter", "llm_failure_rate", "llm_seconds_per_token", "search_latency", "search_jitter", "search_failure_rate",
+        "fail_grade_rate", "max_search_depth", "batch_section_queries", "reuse_planning_sources", "delta_section_revisions")}
+
+def compare(results: dict, baseline: dict, args) -> list:
+    """Return a line per figure that regressed against the baseline."""
+    regressions = []
+    for workflow, result in results.items():
+        base = baseline["results"].get(workflow)
+        if base is None:
+            continue
+        if result["failed"] > base["failed"]:
+            regressions.append(f"{workflow}: {result['failed']} failed reports (baseline {base['failed']})")
+        for (group, name), tolerance in CHECKS.items():
+            value, reference = result[group][name], base[group][name]
+            if value is None or not reference:
+                continue
+            if value > reference * (1 + getattr(args, tolerance)):
+                regressions.append(f"{workflow}: {group}.{name} {value} vs baseline {reference} "
+                                   f"(+{(value / reference - 1):.0%})")
+    return regressions
+
+def print_result(result: dict):
+    latency, llm, search = result["report_seconds"], result["llm"], result["search"]
+    print(f"\n{result['workflow']}: {result['reports'] - result['failed']}/{result['reports']} reports "
+          f"in {result['wall_seconds']:.2f} s, median {latency['median']} s, p95 {latency['p95']} s")
+    print(f"  llm     {llm['calls']:6d} calls  {llm['input_tokens']:9d} prompt tokens  {llm['output_tokens']:8d} output tokens  "
+          f"peak {llm['peak_concurrency']} / mean {llm['mean_concurrency']} in flight")
+    print(f"  cache   {llm['cached_input_tokens']:6d} prompt tokens from the provider's prefix cache "
+          f"({llm['cached_input_tokens'] / (llm['input_tokens'] or 1):.0%})")
+    print(f"  search  {search['calls']:6d} calls  {search['queries']:9d} queries  "
+          f"peak {search['peak_concurrency']} / mean {search['mean_concurrency']} in flight")
+    for node, stats in sorted(result["nodes"].items(), key=lambda item: -item[1]["total_seconds"]):
+        print(f"  {node:<34} {stats['runs']:5d} runs  {stats['mean_ms']:10.2f} ms mean")
+    for error in result["errors"]:
+        print(f"  error: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflow", choices=["all", *WORKFLOWS], default="all")
+    parser.add_argument("--reports", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sections", type=int, default=5, help="Sections per report, including introduction and conclusion")
+    parser.add_argument("--queries", type=int, default=2, help="Search queries per fake query generation")
+    parser.add_argument("--response-words", type=int, default=300)
+    parser.add_argument("--results-per-query", type=int, default=5)
+    parser.add_argument("--source-chars", type=int, default=4000)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-jitter", type=float, default=0.02)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-seconds-per-token", type=float, default=0.0, help="Generation time per output token")
+    parser.add_argument("--search-latency", type=float, default=0.1)
+    parser.add_argument("--search-jitter", type=float, default=0.05)
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--fail-grade-rate", type=float, default=0.0, help="Share of section drafts the fake grader fails")
+    parser.add_argument("--max-search-depth", type=int, help="Search rounds per section (odr.py uses 1)")
+    parser.add_argument("--batch-section-queries", action="store_true",
+                        help="Generate the queries of all sections in one call after planning")
+    parser.add_argument("--reuse-planning-sources", action="store_true",
+                        help="Seed section research with the planning search results")
+    parser.add_argument("--delta-section-revisions", action="store_true",
+                        help="Patch failed section drafts instead of rewriting them")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file for --check and --update-baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a workflow regressed against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25)
+    parser.add_argument("--cost-tolerance", type=float, default=0.02)
+    args = parser.parse_args()
+    # Configuration reads the environment before the configurable values odr.py passes
+    os.environ["BATCH_SECTION_QUERIES"] = str(args.batch_section_queries).lower()
+    os.environ["REUSE_PLANNING_SOURCES"] = str(args.reuse_planning_sources).lower()
+    os.environ["DELTA_SECTION_REVISIONS"] = str(args.delta_section_revisions).lower()
+    if args.max_search_depth:
+        os.environ["MAX_SEARCH_DEPTH"] = str(args.max_search_depth)
+
+    workflows = list(WORKFLOWS) if args.workflow == "all" else [args.workflow]
+    results = {}
+    for workflow in workflows:
+        results[workflow] = asyncio.run(run_workflow(workflow, args))
+        print_result(results[workflow])
+    report = {"params": params(args), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["params"] != report["params"]:
+            print(f"\nBaseline {args.baseline} was recorded with different parameters: {baseline['params']}")
+            sys.exit(2)
+        regressions = compare(results, baseline, args)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
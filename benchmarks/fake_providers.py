@@ -0,0 +1,307 @@
+"""Deterministic stand-ins for the chat model and search providers.
+
+``FakeChatModel`` answers every call the research workflows make (structured
+output for graph.py, tool calls for multi_agent.py) after a configurable
+latency, and ``FakeSearch`` returns Tavily-shaped search responses. Both
+record call counts, token volume and peak concurrency in a shared
+``CallStats`` so benchmarks can report them without any network access.
+``PrefixCache`` reports the prompt-cache hits a provider with prefix caching
+would give each call.
+
+``install(model, search)`` patches both workflows to use them.
+"""
+import re
+import random
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from open_deep_research.state import (BatchedQueries, Feedback, Queries, SearchQuery, Section, SectionEdit, SectionPatch,
+                                      SectionQueries, Sections)
+
+def _digest(text: str) -> int:
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+def estimate_tokens(text: str) -> int:
+    """Roughly four characters per token, like most BPE tokenizers on English text."""
+    return max(1, len(text) // 4)
+
+class PrefixCache:
+    """Provider-side prompt caching: the longest prompt prefix seen before, in blocks of 64 tokens.
+
+    Like DeepSeek's context cache, only a byte-identical prefix from the
+    start of the request counts, and only whole blocks are cached.
+    """
+
+    def __init__(self, block_tokens: int = 64):
+        self.block_chars = block_tokens * 4
+        self.prefixes = set()
+
+    def cached_tokens(self, prompt: str) -> int:
+        """Tokens of ``prompt`` served from the cache; remembers the prefixes of ``prompt``."""
+        digest, cached = hashlib.md5(), 0
+        for end in range(self.block_chars, len(prompt) + 1, self.block_chars):
+            digest.update(prompt[end - self.block_chars:end].encode("utf-8"))
+            prefix = digest.copy().hexdigest()
+            if prefix in self.prefixes and cached == end - self.block_chars:
+                cached = end
+            self.prefixes.add(prefix)
+        return cached // 4
+
+class ProviderError(RuntimeError):
+    """A simulated provider failure."""
+
+class CallStats:
+    """Calls, failures, token volume and concurrency of one fake provider."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self.output_tokens = 0
+        self.queries = 0
+        self.busy_seconds = 0.0
+        self.in_flight = 0
+        self.peak_concurrency = 0
+
+    def begin(self):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+        return time.perf_counter()
+
+    def end(self, started: float):
+        self.in_flight -= 1
+        self.busy_seconds += time.perf_counter() - started
+
+    def summary(self, wall_seconds: float) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "output_tokens": self.output_tokens,
+            "queries": self.queries,
+            "peak_concurrency": self.peak_concurrency,
+            # Average number of calls in flight over the run
+            "mean_concurrency": round(self.busy_seconds / wall_seconds, 2) if wall_seconds else 0.0,
+        }
+
+@dataclass
+class Latency:
+    """Latency and failure profile of a fake provider, in seconds."""
+    mean: float = 0.05
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    per_output_token: float = 0.0
+
+    async def wait(self, rng: random.Random, output_tokens: int = 0):
+        delay = max(0.0, self.mean + rng.uniform(-self.jitter, self.jitter)) + self.per_output_token * output_tokens
+        if delay:
+            await asyncio.sleep(delay)
+        if self.failure_rate and rng.random() < self.failure_rate:
+            raise ProviderError("Simulated provider failure")
+
+class FakeChatModel(BaseChatModel):
+    """A chat model that answers the research workflows' prompts deterministically.
+
+    Structured output requests get the schema the graph asks for; with tools
+    bound, the model follows the supervisor and researcher protocol of
+    multi_agent.py (plan sections, search, write the section, then the
+    introduction and conclusion).
+    """
+
+    latency: Latency
+    stats: Any
+    rng: Any
+    sections: int = 5
+    queries: int = 2
+    response_words: int = 300
+    searches_per_section: int = 1
+    fail_grade_rate: float = 0.0
+    prefix_cache: Optional[Any] = None
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": "fake"}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        raise NotImplementedError("FakeChatModel only supports async calls")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        started = self.stats.begin()
+        try:
+            message = self._respond(messages)
+            output_tokens = estimate_tokens(str(message.content)) + estimate_tokens(str(message.tool_calls))
+            try:
+                # Generation time grows with the length of the answer
+                await self.latency.wait(self.rng, output_tokens)
+            except ProviderError:
+                self.stats.failures += 1
+                raise
+        finally:
+            self.stats.end(started)
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        self.stats.input_tokens += input_tokens
+        self.stats.output_tokens += output_tokens
+        message.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                                  "total_tokens": input_tokens + output_tokens}
+        if self.prefix_cache is not None:
+            # The request as the provider sees it: role and content of every message in order
+            cached = self.prefix_cache.cached_tokens("".join(f"<{m.type}>{m.content}" for m in messages))
+            self.stats.cached_input_tokens += cached
+            message.usage_metadata["input_token_details"] = {"cache_read": cached}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _text(self, seed: str) -> str:
+        words = ["research", "protocol", "agent", "model", "context", "search", "report", "source",
+                 "latency", "tool", "section", "evidence", "analysis", "system", "result", "data"]
+        rng = random.Random(_digest(seed))
+        body = " ".join(rng.choice(words) for _ in range(self.response_words))
+        # The heading identifies the prompt, so every section gets its own queries
+        return f"## Topic {_digest(seed):08x}\n\n{body}"
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        if "Sections" in self.tool_names:
+            return self._supervisor(messages)
+        if "Section" in self.tool_names:
+            return self._researcher(messages)
+        return AIMessage(content=self._text("\n".join(str(m.content) for m in messages)))
+
+    def _tool_call(self, name: str, args: dict, messages) -> AIMessage:
+        call_id = f"call_{_digest(name + str(len(messages)) + str(args)[:200]):x}"
+        return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": call_id}])
+
+    def _supervisor(self, messages) -> AIMessage:
+        said = [str(m.content) for m in messages if isinstance(m, HumanMessage)]
+        if any("Report is now complete" in s for s in said):
+            return AIMessage(content="The report is complete.")
+        if any("Introduction written" in s for s in said):
+            return self._tool_call("Conclusion", {"name": "Conclusion", "content": self._text("conclusion " + said[0])}, messages)
+        if any("Research is complete" in s for s in said):
+            return self._tool_call("Introduction", {"name": "Introduction", "content": self._text("introduction " + said[0])}, messages)
+        topic = said[0] if said else "topic"
+        return self._tool_call("Sections", {"sections": [f"{topic} part {i + 1}" for i in range(max(1, self.sections - 2))]}, messages)
+
+    def _researcher(self, messages) -> AIMessage:
+        tool_results = [m for m in messages if isinstance(m, ToolMessage)]
+        if any(m.name == "Section" for m in tool_results):
+            return AIMessage(content="Section written.")
+        scope = str(messages[0].content)[-200:]
+        if len(tool_results) < self.searches_per_section:
+            search_tool = next(name for name in self.tool_names if name != "Section")
+            queries = [f"Topic {_digest(scope):08x} query {i + 1}" for i in range(self.queries)]
+            return self._tool_call(search_tool, {"queries": queries}, messages)
+        return self._tool_call("Section", {"name": f"Section {_digest(scope) % 1000}", "description": scope[-80:],
+                                           "content": self._text(scope)}, messages)
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tool_names": [getattr(t, "name", getattr(t, "__name__", str(t))) for t in tools]})
+
+    def with_structured_output(self, schema, **kwargs):
+        def parse(message: AIMessage, prompt: str):
+            seed = str(message.content).split("\n", 1)[0].lstrip("# ")
+            if schema is BatchedQueries:
+                # One entry per "Section: <name>" line of the batched query prompt
+                return BatchedQueries(sections=[
+                    SectionQueries(section_name=name, queries=[SearchQuery(search_query=f"{seed} {name} query {i + 1}")
+                                                               for i in range(self.queries)])
+                    for name in re.findall(r"^Section: (.+)$", prompt, re.MULTILINE)])
+            if schema is Queries:
+                return Queries(queries=[SearchQuery(search_query=f"{seed} query {i + 1}")
+                                        for i in range(self.queries)])
+            if schema is Sections:
+                count = max(3, self.sections)
+                # Like a real planner, describe the sections in terms of the planning sources
+                subjects = re.findall(r"^Most relevant content from source: Page \d+ about ([^.]+)\.", prompt, re.MULTILINE) or [seed]
+                return Sections(sections=[Section(name="Introduction", description="Overview", research=False, content="")]
+                                + [Section(name=f"Part {i + 1}", description=f"Sub-topic {i + 1}: {subjects[i % len(subjects)]}",
+                                           research=True, content="") for i in range(count - 2)]
+                                + [Section(name="Conclusion", description="Summary", research=False, content="")])
+            if schema is SectionPatch:
+                # One added sentence citing the first new source
+                urls = re.findall(r"^URL: (\S+)$", prompt, re.MULTILINE)[:1]
+                return SectionPatch(edits=[SectionEdit(find="", replace=str(message.content).split("\n\n", 1)[-1])],
+                                    new_sources=[f"[9] New source: {url}" for url in urls])
+            if schema is Feedback:
+                failed = self.fail_grade_rate and random.Random(_digest(seed)).random() < self.fail_grade_rate
+                return Feedback(grade="fail" if failed else "pass",
+                                follow_up_queries=[SearchQuery(search_query=f"follow-up {seed}")] if failed else [])
+            raise NotImplementedError(f"No fake output for {schema}")
+
+        # A patch is a few sentences, not a whole section
+        model = self.model_copy(update={"response_words": max(10, self.response_words // 10)}) if schema is SectionPatch else self
+
+        async def respond(messages, config):
+            message = await model.ainvoke(messages, config)
+            return parse(message, "\n".join(str(m.content) for m in messages))
+        return RunnableLambda(respond)
+
+class FakeSearch:
+    """Tavily-shaped search results from a fixed pool of URLs, after a simulated latency.
+
+    Queries draw their results from ``url_pool`` pages, so related queries
+    return overlapping sources like a real search engine.
+    """
+
+    def __init__(self, latency: Latency, stats: CallStats, rng: random.Random, results_per_query: int = 5,
+                 source_chars: int = 4000, url_pool: int = 200):
+        self.latency = latency
+        self.stats = stats
+        self.rng = rng
+        self.results_per_query = results_per_query
+        self.source_chars = source_chars
+        self.url_pool = url_pool
+
+    async def __call__(self, query_list: List[str], **params) -> List[dict]:
+        started = self.stats.begin()
+        self.stats.queries += len(query_list)
+        try:
+            try:
+                await self.latency.wait(self.rng)
+            except ProviderError:
+                self.stats.failures += 1
+                raise
+            return [self.response(query) for query in query_list]
+        finally:
+            self.stats.end(started)
+
+    def response(self, query: str) -> dict:
+        words = re.findall(r"\w+", query.lower()) or ["query"]
+        results = []
+        for i in range(self.results_per_query):
+            page = _digest(f"{words[i % len(words)]} {i}") % self.url_pool
+            text = (f"Page {page} about {' '.join(words)}. " * (self.source_chars // 40 + 1))[:self.source_chars]
+            results.append({"title": f"Page {page}", "url": f"https://example.com/{page}", "content": text[:300],
+                            "score": 1.0 - i / self.results_per_query, "raw_content": text})
+        return {"query": query, "follow_up_questions": None, "answer": None, "images": [], "results": results}
+
+def install(model: FakeChatModel, search: FakeSearch, backends: Optional[List[str]] = None):
+    """Route both research workflows to the fake model and search backend."""
+    from open_deep_research import models, utils
+
+    def init_chat_model(*args, **kwargs):
+        return model
+
+    models.init_chat_model = init_chat_model
+    models.MODELS.clear()
+    for name in backends or ["linkup", "tavily"]:
+        utils.register_search_backend(name, search)
+
+    # multi_agent.py calls the Tavily tool directly; keep its formatting, fake the API
+    async def tavily_search_async(search_queries, **kwargs):
+        return await search(search_queries)
+    utils.tavily_search_async = tavily_search_async
@@ -0,0 +1,68 @@
+"""Measure the per-report setup overhead of the research graph.
+
+Compares compiling the graph with a fresh MemorySaver for every report (what
+odr.py used to do) with reusing the process-wide graph from
+``odr.research_graph()``, and reports the one-time warm-up cost separately.
+
+Usage:
+    uv run python benchmarks/graph_setup.py [--requests 200] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault("LINKUP_API_KEY", "benchmark")
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+os.environ.setdefault("CORAL_ORCHESTRATION_RUNTIME", "benchmark")
+
+from langgraph.checkpoint.memory import MemorySaver
+
+import odr
+
+def time_calls(setup, requests: int) -> list:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        setup()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(name: str, timings: list) -> dict:
+    return {
+        "setup": name,
+        "requests": len(timings),
+        "per_request_ms_median": statistics.median(timings) * 1000,
+        "per_request_ms_p95": sorted(timings)[int(len(timings) * 0.95) - 1] * 1000,
+        "total_ms": sum(timings) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    odr.OpenDeepResearch().warm_up()
+    warm_up_ms = (time.perf_counter() - start) * 1000
+
+    results = [
+        summarize("compile per report", time_calls(lambda: odr.builder.compile(checkpointer=MemorySaver()), args.requests)),
+        summarize("shared graph", time_calls(odr.research_graph, args.requests)),
+    ]
+    print(f"warm-up (once per process)   {warm_up_ms:10.2f} ms")
+    for r in results:
+        print(f"{r['setup']:<28} {r['per_request_ms_median']:10.4f} ms/report (p95 {r['per_request_ms_p95']:.4f} ms, "
+              f"{r['total_ms']:.1f} ms for {r['requests']} reports)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"warm_up_ms": warm_up_ms, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measure cold-start import time and peak RSS of the agent entry points.
+
+Each module is imported in a fresh interpreter so nothing is shared between
+runs. Dummy API keys are set so odr.py passes its environment checks.
+
+Usage:
+    uv run python benchmarks/import_time.py [--runs 5] [--output results.json]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["open_deep_research.utils", "odr", "main"]
+
+CHILD = """
+import sys, time, resource
+start = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in bytes on macOS and kilobytes on Linux
+rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+print(f"{elapsed} {rss_mb}")
+"""
+
+def measure(module: str, runs: int) -> dict:
+    env = dict(os.environ)
+    env.setdefault("LINKUP_API_KEY", "benchmark")
+    env.setdefault("DEEPSEEK_API_KEY", "benchmark")
+    env.setdefault("CORAL_ORCHESTRATION_RUNTIME", "benchmark")
+    times, rss = [], []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-W", "ignore", "-c", CHILD, module], cwd=PROJECT_DIR,
+                                env=env, capture_output=True, text=True, check=True)
+        elapsed, peak = result.stdout.split()[-2:]
+        times.append(float(elapsed))
+        rss.append(float(peak))
+    return {
+        "module": module,
+        "runs": runs,
+        "import_seconds_median": statistics.median(times),
+        "import_seconds_min": min(times),
+        "peak_rss_mb_median": statistics.median(rss),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = [measure(module, args.runs) for module in MODULES]
+    for r in results:
+        print(f"{r['module']:<28} import {r['import_seconds_median'] * 1000:8.1f} ms (min {r['import_seconds_min'] * 1000:.1f} ms)"
+              f"   peak RSS {r['peak_rss_mb_median']:7.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
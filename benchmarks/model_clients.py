@@ -0,0 +1,150 @@
+"""Measure chat model client overhead: a new client per node call vs the shared model registry.
+
+Part one times building the DeepSeek client and its structured output
+wrapper for every call (what the graph nodes used to do) against a lookup
+in ``open_deep_research.models``. Part two sends real requests to a local
+OpenAI-compatible stub server and counts the TCP connections they open.
+No API key or network access is needed.
+
+Usage:
+    uv run python benchmarks/model_clients.py [--lookups 100] [--requests 50] [--concurrency 5] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+from langchain.chat_models import init_chat_model
+
+from open_deep_research.models import MODELS, get_chat_model
+from open_deep_research.state import Queries
+
+MODEL = {"model": "deepseek-chat", "model_provider": "deepseek"}
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-benchmark", "object": "chat.completion", "created": 0, "model": "deepseek-chat",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+}).encode("utf-8")
+
+class StubServer:
+    """A keep-alive HTTP/1.1 server answering every request with a chat completion."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+        self.handlers = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.handlers[writer] = asyncio.current_task()
+        try:
+            while True:
+                headers = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in headers.decode("latin-1").split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                await reader.readexactly(length)
+                self.requests += 1
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(COMPLETION)).encode() + b"\r\n\r\n" + COMPLETION)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.handlers.pop(writer, None)
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        # Drop the connections clients keep alive so their handlers finish
+        handlers = list(self.handlers.values())
+        for writer in list(self.handlers):
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        self.server.close()
+        await self.server.wait_closed()
+
+def fresh_structured_model():
+    return init_chat_model(**MODEL).with_structured_output(Queries)
+
+def shared_structured_model():
+    return get_chat_model(**MODEL, schema=Queries)
+
+async def time_lookups(setup, lookups: int) -> dict:
+    timings = []
+    for _ in range(lookups):
+        start = time.perf_counter()
+        setup()
+        timings.append(time.perf_counter() - start)
+    return {"per_call_us_median": statistics.median(timings) * 1e6, "total_ms": sum(timings) * 1000}
+
+async def count_connections(new_model, requests: int, concurrency: int, close: bool) -> dict:
+    server = StubServer()
+    base_url = await server.start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            model = new_model(base_url)
+            await model.ainvoke("ping")
+            if close:
+                # Unclosed clients are finalized at random and can close a reused socket
+                await model.root_async_client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await server.stop()
+    return {"requests": server.requests, "connections": server.connections, "total_ms": elapsed * 1000}
+
+async def run(args) -> dict:
+    results = {"lookups": {}, "connections": {}}
+    for name, setup in (("new client per call", fresh_structured_model), ("model registry", shared_structured_model)):
+        results["lookups"][name] = await time_lookups(setup, args.lookups)
+
+    clients = {
+        # max_retries=0 so a failed request is not hidden by a retry on a new connection
+        "new client per call": (lambda base_url: init_chat_model(**MODEL, api_base=base_url, max_retries=0), True),
+        "model registry": (lambda base_url: get_chat_model(**MODEL, api_base=base_url, max_retries=0), False),
+    }
+    for name, (new_model, close) in clients.items():
+        MODELS.clear()
+        results["connections"][name] = await count_connections(new_model, args.requests, args.concurrency, close)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print("Client setup per node call (structured output model)")
+    for name, r in results["lookups"].items():
+        print(f"  {name:<24} {r['per_call_us_median']:10.1f} us/call ({r['total_ms']:.1f} ms for {args.lookups} calls)")
+    print(f"Connections for {args.requests} requests, {args.concurrency} at a time")
+    for name, r in results["connections"].items():
+        print(f"  {name:<24} {r['connections']:4d} connections for {r['requests']} requests in {r['total_ms']:.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Measure BM25 passage selection on synthetic web pages.
+
+Every page mixes navigation menus, cookie and footer boilerplate, off-topic
+paragraphs and a few paragraphs about the section being written, each of
+those carrying a numbered fact. Both ways of filling the same token budget
+run on the same pages:
+
+- first tokens: every page cut to its first tokens, as the source context
+  was built before
+- bm25 passages: ``pack_context`` with the section as query, keeping the
+  best matching passages of every page
+
+The benchmark reports how many of the relevant facts reach the prompt,
+how much boilerplate gets in, and the time selection takes per page.
+
+Usage:
+    uv run python benchmarks/passage_selection.py [--pages 20] [--page-chars 30000] [--budget 8000] [--runs 5] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from open_deep_research.context import count_tokens, pack_context
+
+SECTION = "Kafka consumer rebalancing: how partition assignment, group coordinators and cooperative rebalancing affect consumer lag"
+
+TOPIC_WORDS = ["kafka", "consumer", "rebalancing", "partition", "assignment", "coordinator", "cooperative",
+               "group", "lag", "offset", "broker", "session", "heartbeat", "sticky", "protocol"]
+OFF_TOPIC_WORDS = ["recipe", "garden", "holiday", "football", "weather", "painting", "travel", "museum", "coffee",
+                   "music", "fashion", "cinema", "hiking", "camera", "novel", "festival", "market", "island"]
+FILLER = ["the", "a", "of", "to", "in", "is", "that", "when", "with", "for", "on", "as", "by", "this", "it", "can"]
+NAVIGATION = ["Home", "Products", "Pricing", "Docs", "Blog", "About us", "Careers", "Contact", "Sign in", "Sign up"]
+BOILERPLATE = ("We use cookies to improve your experience. By continuing to browse you accept our cookie policy. "
+               "Copyright 2025 Example Corp. All rights reserved. Terms of service. Privacy policy. BOILERPLATE")
+
+def paragraph(rng: random.Random, vocabulary: list, words: int) -> str:
+    return " ".join(rng.choice(vocabulary if rng.random() < 0.4 else FILLER) for _ in range(words)).capitalize() + "."
+
+def page(rng: random.Random, index: int, chars: int, relevant: int) -> tuple:
+    """A page of about ``chars`` characters with ``relevant`` paragraphs carrying a fact each."""
+    facts = [f"FACT-{index}-{i}" for i in range(relevant)]
+    blocks = ["\n".join(NAVIGATION), BOILERPLATE]
+    body = []
+    while sum(len(b) for b in body) < chars:
+        body.append(paragraph(rng, OFF_TOPIC_WORDS, rng.randint(60, 120)))
+    for fact in facts:
+        body.insert(rng.randrange(len(body) + 1), f"{paragraph(rng, TOPIC_WORDS, rng.randint(60, 120))} {fact}.")
+    blocks += body + [BOILERPLATE, "\n".join(NAVIGATION)]
+    return "\n\n".join(blocks), facts
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    sources, facts = [], []
+    for i in range(args.pages):
+        content, page_facts = page(rng, i, args.page_chars, args.relevant_paragraphs)
+        sources.append({"title": f"Page {i}", "url": f"https://example.com/{i}", "content": content[:200], "raw_content": content})
+        facts += page_facts
+    per_source = args.budget // args.pages
+
+    strategies = {
+        "first tokens": lambda: pack_context(sources, args.budget, "", max_tokens_per_source=per_source),
+        "bm25 passages": lambda: pack_context(sources, args.budget, SECTION, max_tokens_per_source=per_source),
+    }
+    results = {}
+    for name, select in strategies.items():
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            context = select()
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            "prompt_tokens": count_tokens(context),
+            "facts_found": sum(fact in context for fact in facts),
+            "facts_total": len(facts),
+            "boilerplate_blocks": context.count("BOILERPLATE"),
+            "ms_per_prompt_median": round(statistics.median(timings) * 1000, 2),
+            "ms_per_page": round(statistics.median(timings) * 1000 / args.pages, 3),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-chars", type=int, default=30000)
+    parser.add_argument("--relevant-paragraphs", type=int, default=3, help="Paragraphs about the section per page")
+    parser.add_argument("--budget", type=int, default=8000, help="Token budget of the whole prompt context")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{args.pages} pages of {args.page_chars} characters, {args.budget}-token budget")
+    for name, r in results.items():
+        print(f"  {name:<14} {r['facts_found']:3d}/{r['facts_total']} facts  {r['boilerplate_blocks']:3d} boilerplate blocks  "
+              f"{r['prompt_tokens']:6d} tokens  {r['ms_per_prompt_median']:8.2f} ms/prompt ({r['ms_per_page']:.3f} ms/page)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import random
+import asyncio
+import logging
+import traceback
+from typing import Dict, List, Optional
+
+import httpx
+from anyio import BrokenResourceError, ClosedResourceError, EndOfStream
+from langchain.tools import StructuredTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+logger = logging.getLogger(__name__)
+
+# Failures of the connection to Coral itself, as opposed to a tool reporting an error
+TRANSPORT_ERRORS = (
+    ClosedResourceError,
+    BrokenResourceError,
+    EndOfStream,
+    ConnectionError,
+    httpx.TransportError,
+)
+
+class CoralTransportError(Exception):
+    """The Coral connection failed while calling a tool; the call can be retried once reconnected."""
+
+def is_transport_error(error: BaseException) -> bool:
+    """Return True if ``error`` (or anything it wraps) is a Coral connection failure.
+
+    Only meaningful for errors raised by a Coral tool call itself; the
+    research behind a mention fails with the same exception types when a
+    model or search API drops its connection. Use ``is_coral_disconnect``
+    for errors of a whole mention handler.
+    """
+    if isinstance(error, (CoralTransportError, *TRANSPORT_ERRORS)):
+        return True
+    if isinstance(error, McpError) and error.error.code == CONNECTION_CLOSED:
+        return True
+    if isinstance(error, BaseExceptionGroup):
+        return any(is_transport_error(e) for e in error.exceptions)
+    cause = error.__cause__ or error.__context__
+    return cause is not None and is_transport_error(cause)
+
+def is_coral_disconnect(error: BaseException) -> bool:
+    """Return True if a mention handler failed because the Coral connection dropped.
+
+    Only ``CoralTransportError``, which ``CoralSession.call`` raises for real
+    Coral failures, counts. A connection error of a model or search API
+    during research is a failure of the task, and so is anything chained
+    to one, so the cause chain is not followed.
+    """
+    if isinstance(error, CoralTransportError):
+        return True
+    if isinstance(error, BaseExceptionGroup):
+        return any(is_coral_disconnect(e) for e in error.exceptions)
+    return False
+
+class CoralSession:
+    """A persistent, self-healing MCP session with the Coral server.
+
+    One background task owns the SSE session: it connects, loads the Coral
+    tools, pings the server every ``health_interval`` seconds and, when the
+    transport breaks, reconnects with jittered exponential backoff and loads
+    the tools again. Callers use the proxy tools returned by ``start``, which
+    always call through the current session, so nothing has to be rebuilt
+    after a reconnect.
+
+    Args:
+        url: Coral SSE URL including the agent query string
+        timeout: HTTP timeout for the SSE connection
+        sse_read_timeout: Read timeout for the SSE stream
+        health_interval: Seconds between keep-alive pings
+        health_timeout: Seconds a ping may take before the session is considered broken
+        min_backoff: First reconnect delay in seconds
+        max_backoff: Maximum reconnect delay in seconds
+    """
+
+    def __init__(self, url: str, timeout=300, sse_read_timeout=300, health_interval: float = 30,
+                 health_timeout: float = 10, min_backoff: float = 1, max_backoff: float = 60):
+        self.client = MultiServerMCPClient(
+            connections={
+                "coral": {
+                    "transport": "sse",
+                    "url": url,
+                    "timeout": timeout,
+                    "sse_read_timeout": sse_read_timeout,
+                }
+            }
+        )
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.healthy = False
+        self.connects = 0
+        self._tools: Dict[str, object] = {}
+        self._ready = asyncio.Event()
+        self._broken = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(self.min_backoff, min(self.max_backoff, self.min_backoff * 2 ** attempt))
+
+    async def _keep_alive(self, session):
+        """Ping the server until a ping fails or a caller reports a broken transport."""
+        while not self._broken.is_set():
+            try:
+                await asyncio.wait_for(self._broken.wait(), timeout=self.health_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._broken.is_set():
+                return
+            try:
+                await asyncio.wait_for(session.send_ping(), timeout=self.health_timeout)
+            except Exception as e:
+                logger.warning(f"Coral health probe failed: {str(e)}")
+                return
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            try:
+                async with self.client.session("coral") as session:
+                    tools = await load_mcp_tools(session)
+                    self._tools = {tool.name: tool for tool in tools}
+                    self._broken.clear()
+                    self.healthy = True
+                    self._ready.set()
+                    self.connects += 1
+                    attempt = 0
+                    logger.info(f"Coral session established with {len(tools)} tools")
+                    await self._keep_alive(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                kind = "transport" if is_transport_error(e) else "unexpected"
+                logger.error(f"Coral session lost ({kind} error): {str(e)}")
+                logger.debug(traceback.format_exc())
+
+            self.healthy = False
+            self._ready.clear()
+            delay = self._backoff(attempt)
+            attempt += 1
+            logger.info(f"Reconnecting to Coral in {delay:.1f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    async def wait_ready(self, timeout: Optional[float] = None):
+        """Wait until the session is connected and its tools are loaded."""
+        await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+
+    async def call(self, name: str, args: dict):
+        """Call a Coral tool through the current session.
+
+        Raises:
+            CoralTransportError: If the connection failed during the call. The
+                session reconnects in the background.
+        """
+        await self.wait_ready()
+        try:
+            return await self._tools[name].ainvoke(args)
+        except Exception as e:
+            if not is_transport_error(e):
+                raise
+            self.healthy = False
+            self._broken.set()
+            raise CoralTransportError(f"Coral connection failed during {name}: {str(e)}") from e
+
+    def _proxy(self, tool) -> StructuredTool:
+        name = tool.name
+
+        async def call_tool(**kwargs):
+            return await self.call(name, kwargs)
+
+        return StructuredTool(
+            name=name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            coroutine=call_tool,
+        )
+
+    async def start(self, timeout: Optional[float] = None) -> List[StructuredTool]:
+        """Start the session task and return proxy tools for every Coral tool."""
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run(), name="coral-session")
+        await self.wait_ready(timeout)
+        return [self._proxy(tool) for tool in self._tools.values()]
+
+    async def close(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        self.healthy = False
+        self._ready.clear()
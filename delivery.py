@@ -0,0 +1,197 @@
+import os
+import re
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import List, Tuple
+
+from open_deep_research.events import PlanReady, SectionCompleted
+
+logger = logging.getLogger(__name__)
+
+# Coral messages are stored and fanned out whole, keep each one small
+DEFAULT_MESSAGE_MAX_CHARS = 4000
+
+# Messages already sent per (thread, recipient, messages) whose delivery was interrupted,
+# so a retried mention resumes instead of sending the first parts again
+_partial_deliveries: "OrderedDict[Tuple[str, str, str], int]" = OrderedDict()
+_MAX_PARTIAL_DELIVERIES = 1024
+
+_SECTION_PATTERN = re.compile(r"\n(?=#{1,2} )")
+# Heading lines at the end of a chunk, which belong with the text that follows them
+_TRAILING_HEADINGS = re.compile(r"(?:^|\n)((?:#{1,6} [^\n]*\n*)+)$")
+
+def _flush(chunks: List[str], current: str, separator: str, max_chars: int) -> str:
+    """Close ``current`` as a chunk, except for trailing headings, which are returned to lead the next one."""
+    match = _TRAILING_HEADINGS.search(current)
+    if not match or len(match.group(1)) > max_chars // 2:
+        if current:
+            chunks.append(current)
+        return ""
+    if current[:match.start()].strip():
+        chunks.append(current[:match.start()])
+    return match.group(1).rstrip("\n") + separator
+
+def _split_block(block: str, max_chars: int, lead: str = "") -> List[str]:
+    """Split ``lead`` followed by one block on paragraph, line, then word boundaries.
+
+    Words are only cut when a single word is longer than a chunk. ``lead``
+    (headings with their separator) starts the first chunk.
+    """
+    if len(lead) + len(block) <= max_chars:
+        return [lead + block]
+    for separator in ("\n\n", "\n", " "):
+        parts = block.split(separator)
+        if len(parts) > 1:
+            chunks = []
+            current = lead
+            for part in parts:
+                candidate = current + part if current == lead else f"{current}{separator}{part}"
+                if len(candidate) <= max_chars:
+                    current = candidate
+                    continue
+                next_lead = lead if current == lead else _flush(chunks, current, separator, max_chars)
+                pieces = _split_block(part, max_chars, next_lead)
+                chunks.extend(pieces[:-1])
+                current = pieces[-1]
+            if current:
+                chunks.append(current)
+            return chunks
+    room = max(max_chars - len(lead), 1)
+    return [lead + block[:room]] + [block[i:i + max_chars] for i in range(room, len(block), max_chars)]
+
+def split_report(report: str, max_chars: int = DEFAULT_MESSAGE_MAX_CHARS) -> List[str]:
+    """Split a markdown report into message-sized chunks.
+
+    Sections (``#``/``##`` headings) are kept together where they fit, and
+    consecutive small sections are packed into the same chunk. A section
+    too long for one chunk is split at paragraph, line or word boundaries,
+    and a heading always stays with the text that follows it.
+
+    Args:
+        report: The markdown report
+        max_chars: Maximum number of characters per chunk
+
+    Returns:
+        List of chunks that concatenate back to the report's sections
+    """
+    chunks = []
+    current = ""
+    for section in _SECTION_PATTERN.split(report.strip()):
+        section = section.strip()
+        if not section:
+            continue
+        candidate = f"{current}\n\n{section}" if current else section
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        pieces = _split_block(section, max_chars, _flush(chunks, current, "\n\n", max_chars))
+        chunks.extend(pieces[:-1])
+        current = pieces[-1]
+    if current:
+        chunks.append(current)
+    return chunks
+
+def report_reference(report: str, report_path: str, report_id: str = None) -> str:
+    """Build a compact message pointing at a stored report instead of carrying it."""
+    title = next((line.lstrip("#").strip() for line in report.splitlines() if line.startswith("#")), "Research report")
+    sections = [line.lstrip("#").strip() for line in report.splitlines() if line.startswith("## ")]
+    summary = f"Report ready: {title}\n"
+    if sections:
+        summary += "Sections: " + "; ".join(sections) + "\n"
+    summary += f"Length: {len(report)} characters\nSaved to: {report_path}"
+    if report_id:
+        summary += f"\nReport ID: {report_id} (mention me with \"get report {report_id}\" to receive the full report)"
+    return summary
+
+async def deliver_report(send_message, thread_id: str, recipient_id: str, report: str, report_path: str,
+                         report_id: str = None, mode: str = None, max_chars: int = None) -> int:
+    """Send a finished report to a Coral thread without routing it through an LLM.
+
+    If sending fails partway, delivering the same report to the same thread
+    and recipient again (a retried mention) resumes after the messages that
+    already went out, so the recipient gets every part once.
+
+    Args:
+        send_message: The Coral ``send_message`` tool
+        thread_id: Thread to reply in
+        recipient_id: Agent to mention in the reply
+        report: The report content
+        report_path: Where the report is stored
+        report_id: ID of the report in the report store, if any
+        mode: "chunks" to send the whole report split into messages, or
+            "reference" to send a short summary with the report location.
+            Defaults to the REPORT_DELIVERY environment variable, then "chunks".
+        max_chars: Maximum characters per message. Defaults to the
+            CORAL_MESSAGE_MAX_CHARS environment variable.
+
+    Returns:
+        Number of messages the report was delivered in
+    """
+    mode = mode or os.getenv("REPORT_DELIVERY", "chunks")
+    max_chars = max_chars or int(os.getenv("CORAL_MESSAGE_MAX_CHARS", DEFAULT_MESSAGE_MAX_CHARS))
+
+    if mode == "reference":
+        messages = [report_reference(report, report_path, report_id)]
+    elif mode == "chunks":
+        # Leave room for the part header and the trailing report location
+        footer = f"\n\nReport saved to: {report_path}"
+        chunks = split_report(report, max(max_chars - len(footer) - 32, 1))
+        if len(chunks) == 1:
+            messages = [chunks[0] + footer]
+        else:
+            messages = [f"[Report part {i}/{len(chunks)}]\n\n{chunk}" for i, chunk in enumerate(chunks, 1)]
+            messages[-1] += footer
+    else:
+        raise ValueError(f"Unsupported report delivery mode: {mode}. Use 'chunks' or 'reference'.")
+
+    key = (thread_id, recipient_id, hashlib.sha256("\0".join(messages).encode("utf-8")).hexdigest())
+    sent = _partial_deliveries.pop(key, 0)
+    if sent:
+        logger.info(f"Resuming delivery to {recipient_id} in thread {thread_id} after {sent} of {len(messages)} message(s)")
+    try:
+        for content in messages[sent:]:
+            await send_message.ainvoke({
+                "threadId": thread_id,
+                "content": content,
+                "mentions": [recipient_id],
+            })
+            sent += 1
+    except BaseException:
+        if sent:
+            _partial_deliveries[key] = sent
+            while len(_partial_deliveries) > _MAX_PARTIAL_DELIVERIES:
+                _partial_deliveries.popitem(last=False)
+        raise
+    logger.info(f"Delivered report to {recipient_id} in thread {thread_id} as {len(messages)} message(s)")
+    return len(messages)
+
+def progress_messages(event, max_chars: int = DEFAULT_MESSAGE_MAX_CHARS) -> List[str]:
+    """Format a research event as progress messages; events not worth forwarding give none."""
+    if isinstance(event, PlanReady):
+        researched = [s.name for s in event.sections if s.research]
+        return [f"[Report plan] {len(event.sections)} sections: " + ", ".join(s.name for s in event.sections)
+                + f". Researching {len(researched)} of them now; sections follow as they are finished."]
+    if isinstance(event, SectionCompleted):
+        header = f"[Section ready] {event.section.name}"
+        chunks = split_report(event.section.content, max(max_chars - len(header) - 16, 1))
+        if len(chunks) == 1:
+            return [f"{header}\n\n{chunks[0]}"]
+        return [f"{header} ({i}/{len(chunks)})\n\n{chunk}" for i, chunk in enumerate(chunks, 1)]
+    return []
+
+async def deliver_progress(send_message, thread_id: str, recipient_id: str, event, max_chars: int = None) -> int:
+    """Forward the report plan or a finished section to a Coral thread while the report is being written.
+
+    Returns:
+        Number of messages sent
+    """
+    max_chars = max_chars or int(os.getenv("CORAL_MESSAGE_MAX_CHARS", DEFAULT_MESSAGE_MAX_CHARS))
+    messages = progress_messages(event, max_chars)
+    for content in messages:
+        await send_message.ainvoke({
+            "threadId": thread_id,
+            "content": content,
+            "mentions": [recipient_id],
+        })
+    return len(messages)
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import traceback
+from typing import Awaitable, Callable, Optional, Tuple
+
+from delivery import deliver_progress, deliver_report
+from mentions import Mention, extract_report_id, extract_topic
+from report_store import ReportStore
+
+logger = logging.getLogger(__name__)
+
+ResearchTool = Callable[..., Awaitable[Tuple[str, dict]]]
+
+class ResearchDispatcher:
+    """Answer research mentions without an LLM in the control loop.
+
+    The dispatcher reads the topic straight from the mention, runs the
+    research tool and delivers the report in the same thread with
+    ``send_message``. No model call is spent on choosing tools or on
+    re-typing the report. "get report <id>" mentions are answered from the
+    report store without running any research. With ``progress`` the
+    report plan and every finished section are forwarded while the rest of
+    the report is still being written.
+
+    Args:
+        send_message: The Coral ``send_message`` tool
+        research: Coroutine taking a topic and ``report_id`` and ``on_event``
+            keywords and returning ``(report, artifact)`` like ``odr_tool_async``
+        report_store: Store to answer report lookups from
+        progress: Forward the plan and finished sections as they are ready
+    """
+
+    def __init__(self, send_message, research: ResearchTool, report_store: Optional[ReportStore] = None,
+                 progress: bool = False):
+        self.send_message = send_message
+        self.research = research
+        self.report_store = report_store
+        self.progress = progress
+
+    async def reply(self, mention: Mention, content: str):
+        """Send ``content`` to the sender of ``mention`` in its thread."""
+        await self.send_message.ainvoke({
+            "threadId": mention.thread_id,
+            "content": content,
+            "mentions": [mention.sender_id],
+        })
+
+    async def __call__(self, mention: Mention):
+        report_id = extract_report_id(mention.content)
+        if report_id and self.report_store:
+            found = await self.report_store.fetch(report_id)
+            if not found:
+                await self.reply(mention, f"error: no stored report with ID {report_id}")
+                return
+            stored, report = found
+            await deliver_report(self.send_message, mention.thread_id, mention.sender_id, report, stored.path, report_id=stored.report_id)
+            return
+
+        topic = extract_topic(mention.content)
+        if not topic:
+            await self.reply(mention, "error: the mention did not contain a research topic")
+            return
+
+        try:
+            logger.info(f"Dispatching research on '{topic}' for {mention.sender_id}")
+            if self.progress:
+                report, artifact = await self.research_with_progress(mention, topic)
+            else:
+                report, artifact = await self.research(topic, report_id=mention.request_id)
+        except Exception as e:
+            logger.error(f"Research on '{topic}' failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            await self.reply(mention, f"error: {str(e)}")
+            return
+
+        await deliver_report(self.send_message, mention.thread_id, mention.sender_id, report, artifact["report_path"],
+                             report_id=artifact.get("report_id"))
+
+    async def research_with_progress(self, mention: Mention, topic: str):
+        """Run the research tool while forwarding its progress events to the sender, in order."""
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def forward():
+            while (event := await events.get()) is not None:
+                try:
+                    await deliver_progress(self.send_message, mention.thread_id, mention.sender_id, event)
+                except Exception as e:
+                    # Progress is best effort; the final report is still delivered
+                    logger.warning(f"Failed to forward progress to {mention.sender_id}: {str(e)}")
+
+        forwarder = asyncio.create_task(forward())
+        try:
+            return await self.research(topic, report_id=mention.request_id, on_event=events.put_nowait)
+        finally:
+            events.put_nowait(None)
+            await forwarder
@@ -1,28 +1,48 @@
 import logging
-import os, json, asyncio, traceback
-from langchain_mcp_adapters.client import MultiServerMCPClient
+import os, json, asyncio
 from langchain.prompts import ChatPromptTemplate
 from langchain.chat_models import init_chat_model
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from langchain.tools import Tool
+from langchain.tools import StructuredTool
 from dotenv import load_dotenv
-from anyio import ClosedResourceError
 import urllib.parse
 from odr import OpenDeepResearch 
+from mentions import Mention
+from dispatcher import ResearchDispatcher
+from delivery import deliver_report
+from worker_pool import ResearchWorkerPool
+from coral_session import CoralSession
+from report_store import ReportStore
+from open_deep_research.budget import ResearchBudget
+from open_deep_research.metrics import start_metrics_server, monitor_event_loop_lag
 import tempfile
+from contextvars import ContextVar
+from typing import Optional
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-async def odr_tool_async(topic: str):
-    research = OpenDeepResearch()
-    report = await research.generate_research_report(topic)
-    temp_dir = os.path.join(os.getcwd(), "temp")
-    os.makedirs(temp_dir, exist_ok=True)
-    report_path = os.path.join(temp_dir, "report.txt")
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write(report)
-    return (report, {"report_content": report, "report_path": report_path})
+# Budget of the mention a worker is handling; tool calls of the agent run in the worker's context
+mention_budget: ContextVar[Optional[ResearchBudget]] = ContextVar("mention_budget", default=None)
+
+async def odr_tool_async(topic: str, report_store: ReportStore, report_id: str = None, on_event=None,
+                         budget: Optional[ResearchBudget] = None):
+    # A finished report for this request is served from disk instead of regenerated
+    found = await report_store.fetch(report_id) if report_id else None
+    if found:
+        stored, report = found
+        logger.info(f"Serving stored report {stored.report_id} for '{topic}'")
+    else:
+        research = OpenDeepResearch()
+        report = await research.generate_research_report(topic, on_event=on_event, budget=budget)
+        stored = await report_store.save(report, report_id=report_id, topic=topic)
+    return (report, {"report_content": report, "report_id": stored.report_id, "report_path": stored.path, "content_hash": stored.content_hash})
+
+async def get_report_tool_async(report_id: str, report_store: ReportStore):
+    found = await report_store.fetch(report_id)
+    if not found:
+        raise ValueError(f"No stored report with ID {report_id}")
+    stored, report = found
+    return (report, {"report_content": report, "report_id": stored.report_id, "report_path": stored.path, "content_hash": stored.content_hash})
 
 def get_tools_description(tools):
     return "\n".join(
@@ -31,6 +51,9 @@ def get_tools_description(tools):
     )
 
 async def create_agent(coral_tools, agent_tools):
+    # langchain.agents is slow to import and only needed in agent mode
+    from langchain.agents import create_tool_calling_agent, AgentExecutor
+
     coral_tools_description = get_tools_description(coral_tools)
     agent_tools_description = get_tools_description(agent_tools)
     combined_tools = coral_tools + agent_tools
@@ -39,22 +62,21 @@ async def create_agent(coral_tools, agent_tools):
         (
             "system",
             f"""You are a specialized research agent interacting with the tools from Coral Server and having your own tools. Your task is to perform any instructions coming from any agent.
-                Follow these steps in order:
-
-                1. Call wait_for_mentions from coral tools (timeoutMs: 30000) to receive mentions from other agents.
-                2. When you receive a mention, keep the thread ID and the sender ID.
-                3. Think about the content (instruction) of the message and check only from the list of your tools available for you to action.
-                4. Check the tool schema and make a plan in steps for the task you want to perform.
-                5. Only call the tools you need to perform for each step of the plan to complete the instruction in the content.
-                6. Think about the content and see if you have executed the instruction to the best of your ability and the tools. Make this your response as "answer".
-                7. Use send_message from coral tools to send a message in the same thread ID to the sender Id you received the mention from, with content: "answer" containing the report content and the file path where the report is saved.
-                8. If any error occurs, use send_message to send a message in the same thread ID to the sender Id you received the mention from, with content: "error".
-                9. Always respond back to the sender agent even if you have no answer or error.
-                10. Repeat the process from step 1.
+                You have received a mention from another agent. Follow these steps in order:
+
+                1. Keep the thread ID and the sender ID of the mention.
+                2. Think about the content (instruction) of the message and check only from the list of your tools available for you to action.
+                3. Check the tool schema and make a plan in steps for the task you want to perform.
+                4. Only call the tools you need to perform for each step of the plan to complete the instruction in the content.
+                5. Think about the content and see if you have executed the instruction to the best of your ability and the tools. Make this your response as "answer".
+                6. If you generated a report with open_deepresearch or fetched one with get_report, pass it the thread ID and the sender ID: it delivers the report to the sender itself, so do not send the report content again. Otherwise, use send_message from coral tools to send a message in the same thread ID to the sender Id you received the mention from, with content: "answer".
+                7. If any error occurs, use send_message to send a message in the same thread ID to the sender Id you received the mention from, with content: "error".
+                8. Always respond back to the sender agent even if you have no answer or error.
 
             These are the list of coral tools: {coral_tools_description}
             These are the list of your tools: {agent_tools_description}."""
         ),
+        ("human", "Thread ID: {thread_id}\nSender ID: {sender_id}\nContent: {content}"),
         ("placeholder", "{agent_scratchpad}")
     ])
 
@@ -90,53 +112,166 @@ async def main():
     
     timeout = os.getenv("TIMEOUT_MS", 300)
 
-    client = MultiServerMCPClient(
-        connections={
-            "coral": {
-                "transport": "sse",
-                "url": CORAL_SERVER_URL,
-                "timeout": timeout,
-                "sse_read_timeout": timeout,
-            }
-        }
+    # Background tasks and servers, stopped when the agent shuts down
+    background_tasks = []
+    metrics_server = None
+
+    # Optional Prometheus endpoint on http://METRICS_HOST:METRICS_PORT/metrics
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        metrics_server = await start_metrics_server(int(metrics_port), host=os.getenv("METRICS_HOST", "127.0.0.1"))
+        background_tasks.append(asyncio.create_task(monitor_event_loop_lag(), name="event-loop-lag"))
+
+    # One persistent session that reconnects by itself; the tools it returns survive reconnects
+    session = CoralSession(
+        CORAL_SERVER_URL,
+        timeout=timeout,
+        sse_read_timeout=timeout,
+        health_interval=float(os.getenv("CORAL_HEALTH_INTERVAL", "30")),
+        max_backoff=float(os.getenv("CORAL_MAX_BACKOFF", "60")),
     )
+    coral_tools = await session.start()
     logger.info("Coral Server Connection Established")
-
-    coral_tools = await client.get_tools(server_name="coral")
     logger.info(f"Coral tools count: {len(coral_tools)}")
 
+    # The receiver owns wait_for_mentions, workers only need the reply tools
+    wait_for_mentions = next(tool for tool in coral_tools if tool.name == "wait_for_mentions")
+    send_message = next(tool for tool in coral_tools if tool.name == "send_message")
+    worker_coral_tools = [tool for tool in coral_tools if tool.name != "wait_for_mentions"]
+
+    # Compile the research graph and load the model integrations before the first mention
+    OpenDeepResearch().warm_up()
+
+    # Finish reports a previous process was interrupted in; requesters asking again hit the report cache
+    if os.getenv("RESEARCH_CHECKPOINT_DB"):
+        background_tasks.append(asyncio.create_task(OpenDeepResearch().resume_incomplete_reports(), name="resume-reports"))
+
+    report_store = ReportStore.from_env()
+    logger.info(f"Storing reports in {report_store.root}")
+
+    async def research(topic: str, report_id: str = None, on_event=None):
+        return await odr_tool_async(topic, report_store, report_id=report_id, on_event=on_event, budget=mention_budget.get())
+
+    async def deliver_tool_result(result, threadId: str, senderId: str):
+        # Deliver the report straight to Coral so the agent model never re-emits it
+        report, artifact = result
+        sent = await deliver_report(send_message, threadId, senderId, report, artifact["report_path"], report_id=artifact["report_id"])
+        return (f"Report {artifact['report_id']} was delivered to {senderId} in thread {threadId} as {sent} message(s) and saved to {artifact['report_path']}. Do not send the report content again.", artifact)
+
+    async def odr_deliver_tool_async(topic: str, threadId: str, senderId: str):
+        return await deliver_tool_result(await research(topic), threadId, senderId)
+
+    async def get_report_deliver_tool_async(reportId: str, threadId: str, senderId: str):
+        return await deliver_tool_result(await get_report_tool_async(reportId, report_store), threadId, senderId)
+
     agent_tools = [
-        Tool(
+        StructuredTool(
             name="open_deepresearch",
             func=None,
-            coroutine=odr_tool_async,
-            description="Generates a comprehensive research report on a given topic using OpenDeepResearch. Saves the report to a temporary directory as report.txt and returns the complete research report content along with the file path.",
+            coroutine=odr_deliver_tool_async,
+            description="Generates a comprehensive research report on a given topic using OpenDeepResearch, saves it, and sends it directly to the sender agent in the given thread. Returns a short confirmation with the file path, not the report content.",
             args_schema={
                 "properties": {
                     "topic": {
                         "type": "string",
                         "description": "The topic for the research report"
+                    },
+                    "threadId": {
+                        "type": "string",
+                        "description": "The thread ID of the mention to deliver the report to"
+                    },
+                    "senderId": {
+                        "type": "string",
+                        "description": "The sender ID of the mention to deliver the report to"
                     }
                 },
-                "required": ["topic"],
+                "required": ["topic", "threadId", "senderId"],
+                "type": "object"
+            },
+            response_format="content_and_artifact"
+        ),
+        StructuredTool(
+            name="get_report",
+            func=None,
+            coroutine=get_report_deliver_tool_async,
+            description="Sends a previously generated report, looked up by its report ID, directly to the sender agent in the given thread without generating it again. Returns a short confirmation with the file path, not the report content.",
+            args_schema={
+                "properties": {
+                    "reportId": {
+                        "type": "string",
+                        "description": "The ID of a previously generated report"
+                    },
+                    "threadId": {
+                        "type": "string",
+                        "description": "The thread ID of the mention to deliver the report to"
+                    },
+                    "senderId": {
+                        "type": "string",
+                        "description": "The sender ID of the mention to deliver the report to"
+                    }
+                },
+                "required": ["reportId", "threadId", "senderId"],
                 "type": "object"
             },
             response_format="content_and_artifact"
         )
     ]
-    
-    agent_executor = await create_agent(coral_tools, agent_tools)
-
-    while True:
-        try:
-            logger.info("Starting new agent invocation")
-            await agent_executor.ainvoke({"agent_scratchpad": []})
-            logger.info("Completed agent invocation, restarting loop")
-            await asyncio.sleep(1)
-        except Exception as e:
-            logger.error(f"Error in agent loop: {str(e)}")
-            logger.error(traceback.format_exc())
-            await asyncio.sleep(5)
+
+    # Dispatcher mode replies without spending LLM calls on the control loop
+    agent_mode = os.getenv("AGENT_MODE", "agent")
+    if agent_mode not in ("agent", "dispatcher"):
+        raise ValueError(f"Unsupported AGENT_MODE: {agent_mode}. Use 'agent' or 'dispatcher'.")
+
+    # Forward the plan and finished sections before the whole report is done
+    report_progress = os.getenv("REPORT_PROGRESS", "false").lower() in ("1", "true", "yes")
+
+    async def create_worker(worker_id: int):
+        if agent_mode == "dispatcher":
+            handler = ResearchDispatcher(send_message, research, report_store, progress=report_progress)
+        else:
+            agent_executor = await create_agent(worker_coral_tools, agent_tools)
+
+            async def handler(mention: Mention):
+                await agent_executor.ainvoke({
+                    "thread_id": mention.thread_id,
+                    "sender_id": mention.sender_id,
+                    "content": mention.content,
+                    "agent_scratchpad": []
+                })
+
+        async def handle_mention(mention: Mention):
+            # Each request gets its own deadline so the report fits the requester's timeout;
+            # it counts from admission, so time spent queued for a worker is part of it
+            mention_budget.set(ResearchBudget.from_env(started=mention.admitted_at))
+            await handler(mention)
+
+        return handle_mention
+
+    async def reply_busy(mention: Mention, retry_after: int):
+        await send_message.ainvoke({
+            "threadId": mention.thread_id,
+            "content": f"busy: the research queue is full, retry after {retry_after} s",
+            "mentions": [mention.sender_id],
+        })
+
+    workers = int(os.getenv("RESEARCH_WORKERS", "2"))
+    queue_size = int(os.getenv("MENTION_QUEUE_SIZE", "16"))
+    sender_queue_size = int(os.getenv("MENTION_QUEUE_PER_SENDER", "4"))
+    logger.info(f"Starting {workers} research workers in {agent_mode} mode "
+                f"(mention queue size {queue_size}, {sender_queue_size} per sender)")
+
+    pool = ResearchWorkerPool(wait_for_mentions, create_worker, workers=workers, queue_size=queue_size,
+                              sender_queue_size=sender_queue_size, on_reject=reply_busy, session=session)
+    try:
+        await pool.run()
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        if metrics_server is not None:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+        await session.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
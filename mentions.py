@@ -0,0 +1,146 @@
+import re
+import json
+import html
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+NO_MESSAGES_MARKER = "No new messages"
+
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 1, 2
+PRIORITY_LEVELS = {"high": PRIORITY_HIGH, "normal": PRIORITY_NORMAL, "low": PRIORITY_LOW}
+
+_ATTRIBUTE_PATTERN = re.compile(r'(\w+)="(.*?)"', re.DOTALL)
+# Attributes are matched whole, so a raw ">" inside a quoted value does not end the element
+_MESSAGE_PATTERN = re.compile(r'<ResolvedMessage\b((?:\s+\w+="[^"]*")*)\s*/?>', re.DOTALL)
+
+@dataclass
+class Mention:
+    """A single message in a Coral thread that mentions this agent."""
+    thread_id: str
+    sender_id: str
+    content: str
+    message_id: Optional[str] = None
+    mentions: List[str] = field(default_factory=list)
+    # time.monotonic() when the worker pool admitted the mention
+    admitted_at: Optional[float] = None
+
+    @property
+    def request_id(self) -> Optional[str]:
+        """Stable ID of the request carried by this mention, if Coral assigned the message an ID."""
+        return f"{self.thread_id}-{self.message_id}" if self.message_id else None
+
+def _tool_output_to_text(raw) -> str:
+    """Normalize the output of a Coral MCP tool call into a single string."""
+    if raw is None:
+        return ""
+    if isinstance(raw, tuple):
+        raw = raw[0]
+    if isinstance(raw, list):
+        return "\n".join(_tool_output_to_text(item) for item in raw)
+    if isinstance(raw, dict):
+        return raw.get("text") or json.dumps(raw)
+    return str(raw)
+
+def _mention_from_dict(message: dict) -> Optional[Mention]:
+    thread_id = message.get("threadId") or message.get("thread_id")
+    sender_id = message.get("senderId") or message.get("sender_id")
+    if not thread_id or not sender_id:
+        return None
+    mentions = message.get("mentions") or []
+    if isinstance(mentions, str):
+        mentions = [m for m in mentions.split(",") if m]
+    return Mention(
+        thread_id=thread_id,
+        sender_id=sender_id,
+        content=message.get("content", ""),
+        message_id=message.get("id"),
+        mentions=list(mentions),
+    )
+
+def parse_mentions(raw) -> List[Mention]:
+    """Parse the output of the Coral ``wait_for_mentions`` tool.
+
+    Coral servers answer either with a ``<messages>`` block of
+    ``<ResolvedMessage .../>`` elements or with a JSON document holding a
+    ``messages`` list. Both are accepted; a timeout without messages yields
+    an empty list.
+
+    Args:
+        raw: The value returned by ``wait_for_mentions.ainvoke(...)``
+
+    Returns:
+        List of mentions in the order they were received
+    """
+    text = _tool_output_to_text(raw).strip()
+    if not text or text.startswith(NO_MESSAGES_MARKER):
+        return []
+
+    # JSON payloads
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        payload = None
+    if payload is not None:
+        if isinstance(payload, dict):
+            payload = payload.get("messages", [payload])
+        if isinstance(payload, list):
+            return [m for m in (_mention_from_dict(p) for p in payload if isinstance(p, dict)) if m]
+        return []
+
+    # XML payloads
+    mentions = []
+    for match in _MESSAGE_PATTERN.finditer(text):
+        attributes = {k: html.unescape(v) for k, v in _ATTRIBUTE_PATTERN.findall(match.group(1))}
+        mention = _mention_from_dict(attributes)
+        if mention:
+            mentions.append(mention)
+    return mentions
+
+_REQUEST_PREFIX_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:(?:can|could|would)\s+you\s+)?(?:please\s+)?"
+    r"(?:(?:write|generate|create|produce|prepare|do|make|give)\s+(?:me\s+|us\s+)?)?"
+    r"(?:an?\s+|the\s+)?(?:(?:deep|detailed|comprehensive|full|short)\s+)?"
+    r"(?:research\s+)?(?:report|research|summary|overview)\s+(?:on|about|of|for|into)\s+",
+    re.IGNORECASE,
+)
+_AGENT_HANDLE_PATTERN = re.compile(r"^(?:@[\w\-]+[\s,:]*)+")
+
+_PRIORITY_PATTERN = re.compile(
+    r"\[?\s*priority\s*[:=]\s*(high|normal|low)\s*\]?|#(urgent)\b",
+    re.IGNORECASE,
+)
+
+def extract_priority(content: str) -> int:
+    """Return the priority hinted in a mention, ``PRIORITY_NORMAL`` if there is none.
+
+    A mention asks for a priority with ``priority: high|normal|low`` (also in
+    square brackets or as ``priority=low``) or with ``#urgent``.
+    """
+    match = _PRIORITY_PATTERN.search(content)
+    if not match:
+        return PRIORITY_NORMAL
+    return PRIORITY_HIGH if match.group(2) else PRIORITY_LEVELS[match.group(1).lower()]
+
+def extract_topic(content: str) -> str:
+    """Extract the research topic from the text of a mention.
+
+    Leading ``@agent`` handles, priority hints and a request prefix such as
+    "Write me a report on" or a bare "report on" are dropped; whatever
+    remains is the topic.
+    """
+    topic = _PRIORITY_PATTERN.sub("", content.strip())
+    topic = _AGENT_HANDLE_PATTERN.sub("", topic.strip())
+    topic = _REQUEST_PREFIX_PATTERN.sub("", topic.strip())
+    return topic.strip().rstrip(".").strip()
+
+# Report IDs are uuid hex strings or "<thread>-<message>" request IDs: at least
+# 8 characters with a digit, so "get report on <topic>" is not taken for one
+_REPORT_REQUEST_PATTERN = re.compile(
+    r"\b(?:get|fetch|send|resend)\s+(?:me\s+)?report\s+((?=[A-Za-z_.-]*\d)[A-Za-z0-9_.-]{8,})(?![^\s,;:!?)\]])",
+    re.IGNORECASE,
+)
+
+def extract_report_id(content: str) -> Optional[str]:
+    """Return the report ID of a "get report <id>" request, or None for any other mention."""
+    match = _REPORT_REQUEST_PATTERN.search(content)
+    return match.group(1).rstrip(".") if match else None
@@ -1,12 +1,34 @@
 import os
 import sys
+import time
 import uuid
 import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional
 from dotenv import load_dotenv
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.types import Command
+from langchain.chat_models import init_chat_model
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "open_deep_research")))
 from graph import builder
+from report_cache import ReportCache, cache_key
+from research_checkpoints import BoundedMemorySaver, DurableCheckpoints
+from open_deep_research.budget import ResearchBudget
+from open_deep_research.configuration import Configuration
+from open_deep_research.context import load_tokenizer
+from open_deep_research.events import FinalReport, PlanReady, ResearchEvent, SectionCompleted
+from open_deep_research.utils import SearchCoalescer
+from open_deep_research.metrics import REGISTRY, REPORT_BUCKETS, LLMMetricsCallback
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[ResearchEvent], None]
+
+REPORT_SECONDS = REGISTRY.histogram("odr_report_duration_seconds", "Time to generate a research report, by outcome.",
+                                    buckets=REPORT_BUCKETS)
+RUN_CHECKPOINT_BYTES = REGISTRY.histogram("odr_run_checkpoint_bytes", "Checkpoint bytes held by a research run when its report was read, by checkpointer.",
+                                          buckets=(64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6))
+CHECKPOINT_BYTES = REGISTRY.gauge("odr_checkpoint_memory_bytes", "Checkpoint bytes currently held in memory by running reports.")
 
 runtime = os.getenv("CORAL_ORCHESTRATION_RUNTIME", "devmode")
 if runtime == "devmode":
@@ -18,8 +40,72 @@ if not os.environ.get("LINKUP_API_KEY"):
 if not os.environ.get("DEEPSEEK_API_KEY"):
     raise ValueError("This agent runs with DeepSeek and DEEPSEEK_API_KEY environment variable is not set")
 
+# Shared by every OpenDeepResearch instance so concurrent requests coalesce
+_default_report_cache = None
+
+# Compiled once per process; concurrent reports only differ by thread_id
+_research_graphs = {}
+
+# Durable checkpoints from RESEARCH_CHECKPOINT_DB, shared by every instance
+_default_checkpoints = None
+
+def default_report_cache():
+    global _default_report_cache
+    if _default_report_cache is None:
+        _default_report_cache = ReportCache.from_env()
+    return _default_report_cache
+
+def default_durable_checkpoints():
+    global _default_checkpoints
+    if _default_checkpoints is None:
+        _default_checkpoints = DurableCheckpoints.from_env()
+    return _default_checkpoints
+
+def research_graph(interactive: bool = True):
+    """Return the process-wide research graph, compiling it on first use.
+
+    The interactive graph pauses for plan approval and needs a checkpointer;
+    it and its BoundedMemorySaver are shared by every report. Each run uses its own
+    thread_id, so concurrent reports keep separate state, and the thread is
+    deleted from the checkpointer once its report is extracted. Unattended
+    runs (``auto_approve_plan``) finish in one call and use a graph without
+    a checkpointer.
+    """
+    graph = _research_graphs.get(interactive)
+    if graph is None:
+        checkpointer = None
+        if interactive:
+            # Only the latest checkpoints are needed to resume after the plan review
+            checkpointer = BoundedMemorySaver(max_history=int(os.getenv("RESEARCH_CHECKPOINT_HISTORY", "2")))
+            CHECKPOINT_BYTES.set_function(checkpointer.total_size)
+        graph = _research_graphs[interactive] = builder.compile(checkpointer=checkpointer)
+    return graph
+
+def durable_research_graph(saver):
+    """Return the research graph checkpointing to ``saver``, compiling it on first use."""
+    graph = _research_graphs.get(saver)
+    if graph is None:
+        graph = _research_graphs[saver] = builder.compile(checkpointer=saver)
+    return graph
+
+def record_checkpoint_size(thread_id: str, size: int, checkpointer: str):
+    RUN_CHECKPOINT_BYTES.observe(size, checkpointer=checkpointer)
+    logger.info(f"Research run {thread_id} held {size / 1024:.0f} KiB of checkpoints")
+
+@dataclass
+class ResearchResult:
+    """Outcome of one topic of a batch: its report, or the error that stopped it."""
+    topic: str
+    report: Optional[str] = None
+    error: Optional[Exception] = None
+
 class OpenDeepResearch:
-    def __init__(self):
+    def __init__(self, cache: ReportCache = None, interactive: bool = False, checkpoints: DurableCheckpoints = None):
+        self.cache = cache if cache is not None else default_report_cache()
+        # With durable checkpoints a report interrupted by a crash resumes where it stopped
+        self.checkpoints = checkpoints if checkpoints is not None else default_durable_checkpoints()
+        # Machine-to-machine requests approve the generated plan without a human review round trip
+        self.interactive = interactive
         self.REPORT_STRUCTURE = """Use this structure to create a report on the user-provided topic:
 
         1. Introduction (no research needed)
@@ -32,45 +118,319 @@ class OpenDeepResearch:
         - Aim for 1 structural element (either a list or table) that distills the main body sections 
         - Provide a concise summary of the report"""
 
-    async def generate_research_report(self, topic: str):
-        # Setup memory + graph
-        memory = MemorySaver()
-        graph = builder.compile(checkpointer=memory)
-
-        # Thread config
-        thread = {
-            "configurable": {
-                "thread_id": str(uuid.uuid4()),
-                "search_api": "linkup",
-                "planner_provider": "deepseek",
-                "planner_model": "deepseek-chat",
-                "writer_provider": "deepseek",
-                "writer_model": "deepseek-chat",
-                "max_search_depth": 1,
-                "report_structure": self.REPORT_STRUCTURE,
-            }
+    def research_config(self) -> dict:
+        """Effective configuration of a research run, shared by every report."""
+        return {
+            "search_api": "linkup",
+            "planner_provider": "deepseek",
+            "planner_model": "deepseek-chat",
+            "writer_provider": "deepseek",
+            "writer_model": "deepseek-chat",
+            "max_search_depth": 1,
+            "report_structure": self.REPORT_STRUCTURE,
+            "auto_approve_plan": not self.interactive,
         }
 
-        # Step 1: Run graph with the topic
-        async for _ in graph.astream({"topic": topic}, thread, stream_mode="updates"):
-            pass
+    def warm_up(self):
+        """Compile the shared graph, load the configured chat model integrations and the tokenizer.
 
-        # Step 2: Resume automatically (like skipping feedback)
-        async for _ in graph.astream(Command(resume=True), thread, stream_mode="updates"):
-            print(_)
-            print("\n")
-            pass
+        Call at startup so the first report does not pay for graph
+        construction, for importing the model provider package or for
+        downloading the tokenizer.
+        """
+        research_graph(self.interactive)
+        load_tokenizer()
+        config = Configuration.from_runnable_config({"configurable": self.research_config()})
+        for provider, model in {(config.planner_provider, config.planner_model),
+                                (config.writer_provider, config.writer_model)}:
+            init_chat_model(model=model, model_provider=provider)
+
+    async def generate_research_report(self, topic: str, use_cache: bool = True,
+                                       search_coalescer: Optional[SearchCoalescer] = None,
+                                       on_event: Optional[EventHandler] = None,
+                                       budget: Optional[ResearchBudget] = None):
+        run = lambda: self._run_research(topic, search_coalescer, on_event, budget)
+        # Near-identical topics researched with the same configuration share one report
+        if use_cache and self.cache is not None:
+            effective_config = asdict(Configuration.from_runnable_config({"configurable": self.research_config()}))
+            key = cache_key(topic, effective_config)
+            # A report cut short by its budget is served to waiting requests but not cached
+            keep = (lambda _: not budget.degraded) if budget is not None else None
+            # Joining someone else's run must not outlast this request's own deadline
+            timeout = budget.seconds_left() if budget is not None and budget.seconds is not None else None
+            return await self.cache.get_or_create(key, topic, run, keep=keep, timeout=timeout)
+        return await run()
+
+    async def stream_research_report(self, topic: str, use_cache: bool = True,
+                                     budget: Optional[ResearchBudget] = None) -> AsyncIterator[ResearchEvent]:
+        """Research ``topic`` and yield progress events as the report takes shape.
+
+        Sections are researched in parallel and finish independently, so
+        ``SectionCompleted`` events arrive long before the report is done.
+        The last event is always ``FinalReport``; a report served from the
+        cache (or by a run already in progress for the same topic) yields
+        only that event, with ``cached`` set.
+
+        Args:
+            topic: Topic to research
+            use_cache: Serve and store the report through the report cache
+            budget: Time and token budget the report has to fit in
+
+        Yields:
+            Events from open_deep_research.events, ending with FinalReport
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        final_seen = False
+        run = asyncio.create_task(self.generate_research_report(topic, use_cache=use_cache, on_event=events.put_nowait,
+                                                                budget=budget))
+        run.add_done_callback(lambda _: events.put_nowait(None))
+        try:
+            while (event := await events.get()) is not None:
+                final_seen = final_seen or isinstance(event, FinalReport)
+                yield event
+            report = await run
+            if not final_seen:
+                yield FinalReport(report=report, cached=True)
+        finally:
+            # The caller stopped iterating early; do not leave the report running
+            run.cancel()
+            await asyncio.gather(run, return_exceptions=True)
+
+    async def generate_research_reports(self, topics: Iterable[str], concurrency: int = 4, search_concurrency: int = 8,
+                                        use_cache: bool = True) -> AsyncIterator[ResearchResult]:
+        """Research many topics concurrently and yield each result as soon as it is done.
+
+        Runs share one ``SearchCoalescer``: a search query issued by several
+        topics (planner queries overlap heavily for related topics) is sent
+        to the search API once, and at most ``search_concurrency`` search
+        calls run at a time across the batch. A failing topic yields a
+        result with ``error`` set and does not stop the others.
+
+        Args:
+            topics: Topics to research
+            concurrency: Maximum number of reports generated at once
+            search_concurrency: Maximum number of concurrent search API calls
+            use_cache: Serve and store reports through the report cache
+
+        Yields:
+            A ResearchResult per topic, in completion order
+        """
+        search_coalescer = SearchCoalescer(max_concurrency=search_concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def research(topic: str) -> ResearchResult:
+            async with semaphore:
+                try:
+                    report = await self.generate_research_report(topic, use_cache=use_cache, search_coalescer=search_coalescer)
+                    return ResearchResult(topic=topic, report=report)
+                except Exception as e:
+                    logger.error(f"Research on '{topic}' failed: {str(e)}")
+                    return ResearchResult(topic=topic, error=e)
+
+        tasks = [asyncio.create_task(research(topic)) for topic in topics]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # The caller stopped iterating early; do not leave reports running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"Batch of {len(tasks)} topics sent {search_coalescer.executed} of "
+                        f"{search_coalescer.requested} search queries")
+
+    async def _run_research(self, topic: str, search_coalescer: Optional[SearchCoalescer] = None,
+                            on_event: Optional[EventHandler] = None, budget: Optional[ResearchBudget] = None):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            report = await self._run_graph(topic, search_coalescer, on_event, budget)
+            outcome = "ok"
+            return report
+        finally:
+            REPORT_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+
+    async def _run_graph(self, topic: str, search_coalescer: Optional[SearchCoalescer] = None,
+                         on_event: Optional[EventHandler] = None, budget: Optional[ResearchBudget] = None):
+        configurable = self.research_config()
+        if search_coalescer is not None:
+            configurable["search_coalescer"] = search_coalescer
+        config = {
+            "configurable": configurable,
+            # Counts model calls and tokens made anywhere in the graph
+            "callbacks": [LLMMetricsCallback()],
+        }
+        if budget is not None:
+            # Nodes consult the budget to scale their work to what is left
+            configurable["research_budget"] = budget
+            config["callbacks"].append(budget.token_counter())
+
+        if budget is not None and budget.seconds is not None:
+            report = await self._run_within_deadline(topic, config, on_event, budget)
+        else:
+            report = await self._run_mode(topic, config, on_event)
 
-        # Step 3: Get final report
-        final_state = graph.get_state(thread)
-        report = final_state.values.get("final_report")
-        
         # Check if report was generated successfully
         if not report:
             raise ValueError("No report was generated. Please check the topic and try again.")
 
+        if budget is not None and budget.degraded:
+            logger.info(f"Research on '{topic}' was cut to fit its budget: {', '.join(sorted(budget.cuts))}")
+        return report
+
+    async def _run_mode(self, topic: str, config: dict, on_event: Optional[EventHandler] = None):
+        # AUTO_APPROVE_PLAN in the environment overrides the instance setting
+        if self.checkpoints is not None:
+            report = await self._run_durable(topic, config, on_event)
+        elif not Configuration.from_runnable_config(config).auto_approve_plan:
+            report = await self._run_interactive(topic, config, on_event)
+        elif on_event is not None:
+            # The plan is approved inside the graph, so one pass yields the report
+            report = await self._stream(research_graph(interactive=False), {"topic": topic}, config, on_event)
+        else:
+            final_state = await research_graph(interactive=False).ainvoke({"topic": topic}, config)
+            report = final_state.get("final_report")
+        return report
+
+    async def _run_within_deadline(self, topic: str, config: dict, on_event: Optional[EventHandler],
+                                   budget: ResearchBudget):
+        """Run the research, compiling the sections finished so far if the deadline passes first.
+
+        The nodes cut their work short as the deadline approaches, so this
+        is the last resort for runs that overshoot anyway (a slow model call,
+        a stalled search).
+        """
+        plan, completed = [], {}
+
+        def collect(event: ResearchEvent):
+            if isinstance(event, PlanReady):
+                plan[:] = [section.name for section in event.sections]
+            elif isinstance(event, SectionCompleted):
+                completed[event.section.name] = event.section.content
+            if on_event is not None:
+                on_event(event)
+
+        try:
+            return await asyncio.wait_for(self._run_mode(topic, config, collect), timeout=max(budget.seconds_left(), 0))
+        except asyncio.TimeoutError:
+            if not completed:
+                raise TimeoutError(f"Research on '{topic}' ran out of its {budget.seconds:g} s budget "
+                                   "before any section was written")
+            budget.cut("partial_report", f"({len(completed)} of {len(plan)} sections)")
+            report = "\n\n".join(completed[name] for name in plan if name in completed)
+            collect(FinalReport(report=report))
+            return report
+
+    async def _stream(self, graph, graph_input, config: dict, on_event: Optional[EventHandler] = None,
+                      after_step: Optional[Callable[[], Awaitable[None]]] = None) -> Optional[str]:
+        """Run ``graph`` until it ends or pauses, passing custom stream events to ``on_event``.
+
+        Returns:
+            The final report if this pass compiled it, otherwise None
+        """
+        report = None
+        stream_mode = ["updates", "custom"] if on_event is not None else "updates"
+        # Section events are emitted inside the section subgraph
+        async for chunk in graph.astream(graph_input, config, stream_mode=stream_mode, subgraphs=on_event is not None):
+            if on_event is not None:
+                _, mode, data = chunk
+                if mode == "custom":
+                    if isinstance(data, FinalReport):
+                        report = data.report
+                    on_event(data)
+                    continue
+            if after_step is not None:
+                await after_step()
         return report
 
+    async def _run_interactive(self, topic: str, config: dict, on_event: Optional[EventHandler] = None):
+        graph = research_graph(interactive=True)
+        thread_id = str(uuid.uuid4())
+
+        # Thread config
+        thread = {**config, "configurable": {"thread_id": thread_id, **config["configurable"]}}
+
+        try:
+            # Step 1: Run graph with the topic
+            await self._stream(graph, {"topic": topic}, thread, on_event)
+
+            # Step 2: Resume automatically (like skipping feedback)
+            await self._stream(graph, Command(resume=True), thread, on_event)
+
+            # Step 3: Get final report
+            final_state = graph.get_state(thread)
+            return final_state.values.get("final_report")
+        finally:
+            record_checkpoint_size(thread_id, graph.checkpointer.thread_size(thread_id), "memory")
+            # The checkpointer is shared across reports; drop this run's state
+            graph.checkpointer.delete_thread(thread_id)
+
+    def durable_thread_id(self, topic: str) -> str:
+        """Thread ID of a durable run, the same for every attempt at the same report."""
+        effective_config = asdict(Configuration.from_runnable_config({"configurable": self.research_config()}))
+        return "report-" + cache_key(topic, effective_config)
+
+    async def _run_durable(self, topic: str, config: dict, on_event: Optional[EventHandler] = None):
+        saver = await self.checkpoints.saver()
+        graph = durable_research_graph(saver)
+        thread_id = self.durable_thread_id(topic)
+        thread = {**config, "configurable": {"thread_id": thread_id, **config["configurable"]}}
+
+        async with self.checkpoints.thread_lock(thread_id):
+            state = await graph.aget_state(thread)
+            # None resumes from the checkpoint, or runs nothing if the report is already there
+            graph_input = None
+            if state.next:
+                # Finished nodes and Send tasks (sections) are replayed from the checkpoint, not rerun
+                logger.info(f"Resuming interrupted research on '{topic}' before {', '.join(state.next)}")
+            elif not state.values.get("final_report"):
+                graph_input = {"topic": topic}
+
+            await self.checkpoints.start(thread_id, topic)
+            # Nothing to run if the process stopped after the report was written but before it was delivered
+            while state.next or graph_input is not None:
+                if any(task.interrupts for task in state.tasks):
+                    # Paused at plan review in interactive mode: approve like the in-memory path
+                    graph_input = Command(resume=True)
+                # Keep only the checkpoints a resume needs
+                await self._stream(graph, graph_input, thread, on_event, after_step=lambda: self.checkpoints.trim(thread_id))
+                state = await graph.aget_state(thread)
+                graph_input = None
+
+            report = state.values.get("final_report")
+            if report:
+                record_checkpoint_size(thread_id, await self.checkpoints.thread_size(thread_id), "sqlite")
+                await self.checkpoints.finish(thread_id)
+            return report
+
+    async def resume_incomplete_reports(self) -> int:
+        """Resume every report left unfinished by a previous process.
+
+        Resumed reports go through the report cache, so a requester asking
+        again gets the finished report without a second run.
+
+        Returns:
+            The number of reports resumed
+        """
+        if self.checkpoints is None:
+            return 0
+        runs = await self.checkpoints.incomplete_runs()
+        resumed = 0
+        for thread_id, topic in runs:
+            if thread_id != self.durable_thread_id(topic):
+                # Started with a different configuration; it cannot be resumed under this one
+                continue
+            try:
+                await self.generate_research_report(topic)
+                resumed += 1
+            except Exception as e:
+                logger.error(f"Failed to resume research on '{topic}': {str(e)}")
+                continue
+            # A cached report answers the topic without touching the stale run
+            if (thread_id, topic) in await self.checkpoints.incomplete_runs():
+                await self.checkpoints.finish(thread_id)
+        return resumed
+
 if __name__ == "__main__":
     topic = "What is Model Context Protocol?"
     research = OpenDeepResearch()
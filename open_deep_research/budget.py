@@ -0,0 +1,114 @@
+"""Per-request time and token budget consulted by the graph nodes.
+
+A requester that gives up after a timeout gets nothing from a report that
+is still researching. With a ``ResearchBudget`` in the ``research_budget``
+entry of the graph's ``configurable`` config, nodes scale their work to what
+is left: fewer search queries once half the budget is spent, no grading or
+follow-up research once the budget runs low, so sections are published as
+their current draft and the report is compiled in time.
+"""
+
+import os
+import time
+import logging
+from typing import Optional, Set
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from open_deep_research.metrics import REGISTRY, _usage_from_result
+
+logger = logging.getLogger(__name__)
+
+BUDGET_CUTS = REGISTRY.counter("odr_budget_cuts_total", "Research steps reduced or skipped to stay within a report budget, by action.")
+
+# Fractions of the budget left below which the nodes cut back
+HALF_QUERIES_BELOW = 0.5
+ONE_QUERY_BELOW = 0.25
+# Grading a draft and researching it again takes about as long as writing it
+NO_REFLECTION_BELOW = 0.3
+
+class ResearchBudget:
+    """Time and token budget of one research run.
+
+    Args:
+        seconds: Wall-clock seconds the report may take, None for no deadline
+        max_tokens: Model tokens (input and output) the report may use, None for no limit
+        started: ``time.monotonic()`` the deadline counts from, now if None
+    """
+
+    def __init__(self, seconds: Optional[float] = None, max_tokens: Optional[int] = None,
+                 started: Optional[float] = None):
+        self.seconds = seconds
+        self.max_tokens = max_tokens
+        self.started = time.monotonic() if started is None else started
+        self.tokens_used = 0
+        # Actions cut short so far; a report is degraded when any was
+        self.cuts: Set[str] = set()
+
+    @classmethod
+    def from_env(cls, started: Optional[float] = None) -> Optional["ResearchBudget"]:
+        """Budget from RESEARCH_DEADLINE_SECONDS and RESEARCH_TOKEN_BUDGET, or None when neither is set."""
+        seconds = float(os.getenv("RESEARCH_DEADLINE_SECONDS") or 0) or None
+        max_tokens = int(os.getenv("RESEARCH_TOKEN_BUDGET") or 0) or None
+        if seconds is None and max_tokens is None:
+            return None
+        return cls(seconds=seconds, max_tokens=max_tokens, started=started)
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.cuts)
+
+    def seconds_left(self) -> Optional[float]:
+        if self.seconds is None:
+            return None
+        return self.seconds - (time.monotonic() - self.started)
+
+    def remaining(self) -> float:
+        """Fraction of the budget still available, the lower of time and tokens."""
+        left = 1.0
+        if self.seconds is not None:
+            left = min(left, self.seconds_left() / self.seconds)
+        if self.max_tokens is not None:
+            left = min(left, 1 - self.tokens_used / self.max_tokens)
+        return max(left, 0.0)
+
+    def cut(self, action: str, detail: str = ""):
+        """Record that ``action`` was reduced or skipped for lack of budget."""
+        self.cuts.add(action)
+        BUDGET_CUTS.inc(action=action)
+        logger.info(f"Research budget at {self.remaining():.0%}: {action} {detail}".rstrip())
+
+    def number_of_queries(self, configured: int) -> int:
+        """Number of search queries to generate, halved and then reduced to one as the budget runs out."""
+        left = self.remaining()
+        if left >= HALF_QUERIES_BELOW:
+            return configured
+        number = max(1, configured // 2) if left >= ONE_QUERY_BELOW else 1
+        if number < configured:
+            self.cut("fewer_queries", f"({number} of {configured})")
+        return number
+
+    def allow_reflection(self, section_name: str) -> bool:
+        """Whether a draft may still be graded and researched further."""
+        if self.remaining() >= NO_REFLECTION_BELOW:
+            return True
+        self.cut("skip_reflection", f"(publishing the draft of '{section_name}')")
+        return False
+
+    def token_counter(self) -> AsyncCallbackHandler:
+        """Callback handler adding the tokens of every model call to ``tokens_used``."""
+        return _TokenCounter(self)
+
+class _TokenCounter(AsyncCallbackHandler):
+    def __init__(self, budget: ResearchBudget):
+        self.budget = budget
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        input_tokens, output_tokens = _usage_from_result(response)
+        self.budget.tokens_used += input_tokens + output_tokens
+
+def get_research_budget(config) -> Optional[ResearchBudget]:
+    """Return the ResearchBudget passed in a run's configurable config, if any."""
+    return ((config or {}).get("configurable") or {}).get("research_budget")
@@ -38,8 +38,15 @@ class Configuration:
     search_api_config: Optional[Dict[str, Any]] = None
     
     # Graph-specific configuration
+    auto_approve_plan: bool = False # Skip the human_feedback interrupt and research the generated plan directly
+    batch_section_queries: bool = False # Generate the first search queries of all sections in one call after planning
+    reuse_planning_sources: bool = False # Seed section research with the relevant sources found while planning
+    planning_sources_to_skip_search: int = 3 # Relevant planning sources that let a section skip its first search
     number_of_queries: int = 2 # Number of search queries to generate per iteration
     max_search_depth: int = 2 # Maximum number of reflection + search iterations
+    section_context_tokens: int = 20_000 # Token budget of the sources a section is written from
+    planning_context_tokens: int = 20_000 # Token budget of the sources the report plan is written from
+    delta_section_revisions: bool = False # Patch the draft with the new sources after a failed grade instead of rewriting it
     planner_provider: str = "anthropic"  # Defaults to Anthropic as provider
     planner_model: str = "claude-3-7-sonnet-latest" # Defaults to claude-3-7-sonnet-latest
     planner_model_kwargs: Optional[Dict[str, Any]] = None # kwargs for planner_model
@@ -60,8 +67,18 @@ class Configuration:
             config["configurable"] if config and "configurable" in config else {}
         )
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
+            f.name: _coerce(f.type, os.environ.get(f.name.upper(), configurable.get(f.name)))
             for f in fields(cls)
             if f.init
         }
         return cls(**{k: v for k, v in values.items() if v})
+
+def _coerce(field_type, value):
+    """Convert string values from the environment to bool and int fields."""
+    if not isinstance(value, str):
+        return value
+    if field_type in (bool, "bool"):
+        return value.strip().lower() in ("1", "true", "yes")
+    if field_type in (int, "int"):
+        return int(value)
+    return value
@@ -0,0 +1,223 @@
+"""Token-budgeted packing of search sources into prompt context.
+
+Search backends return anything from a few snippets to dozens of full pages,
+and the prompts built from them grew with whatever came back.
+``pack_context`` ranks sources, and the passages of their page content, by
+relevance to what the prompt is about and fills a fixed token budget, so
+prompt cost and time to first token stay predictable.
+
+Pages are split into passages of about 100 words and scored with BM25
+against the prompt's subject; only passages that match it go into the
+prompt, so navigation, boilerplate and off-topic paragraphs are left out.
+
+Tokens are counted with tiktoken's ``cl100k_base`` encoding. If tiktoken is
+missing or the encoding cannot be loaded (it is downloaded on first use
+unless ``TIKTOKEN_CACHE_DIR`` holds a copy), tokens are estimated at 4
+characters each.
+"""
+
+import re
+import math
+import logging
+import threading
+from collections import Counter
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "cl100k_base"
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+def load_tokenizer():
+    """Load the tokenizer, once; returns None if token counts have to be estimated."""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:
+                logger.warning(f"Tokenizer {ENCODING_NAME} unavailable, estimating 4 characters per token: {e}")
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in ``text``."""
+    encoding = load_tokenizer()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Return the longest prefix of ``text`` with at most ``max_tokens`` tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = load_tokenizer()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+## Relevance --
+
+_STOPWORDS = {
+    "the", "and", "for", "are", "with", "this", "that", "from", "into", "its", "how", "what", "which", "their",
+    "about", "between", "overview", "section", "report", "topic", "topics", "main", "key", "brief", "covered",
+}
+
+_WORD = re.compile(r"[a-z0-9]{3,}")
+
+def words(text: str) -> List[str]:
+    """Lower-cased words of ``text``, without stopwords and words of 1-2 characters."""
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+def terms(text: str) -> set:
+    """Distinct words of ``text``, as returned by ``words``."""
+    return set(words(text))
+
+def coverage(query_terms: set, text: str) -> float:
+    """Share of ``query_terms`` that appear in ``text``."""
+    if not query_terms:
+        return 0.0
+    return len(query_terms & terms(text)) / len(query_terms)
+
+def split_passages(text: str) -> List[str]:
+    """Split page content into paragraphs."""
+    return [passage.strip() for passage in re.split(r"\n\s*\n|\n", text) if passage.strip()]
+
+def chunk_passages(text: str, words_per_chunk: int = 100) -> List[str]:
+    """Split page content into passages of up to ``words_per_chunk`` words.
+
+    Consecutive short paragraphs (menus, headings, captions) are merged into
+    one passage and long paragraphs are cut into windows.
+    """
+    chunks, pending, pending_words = [], [], 0
+    for paragraph in split_passages(text):
+        paragraph_words = paragraph.split()
+        if pending and pending_words + len(paragraph_words) > words_per_chunk:
+            chunks.append("\n".join(pending))
+            pending, pending_words = [], 0
+        if len(paragraph_words) > words_per_chunk:
+            # Windows of equal size, so no window is a stray tail of a few words
+            size = math.ceil(len(paragraph_words) / math.ceil(len(paragraph_words) / words_per_chunk))
+            chunks.extend(" ".join(paragraph_words[i:i + size]) for i in range(0, len(paragraph_words), size))
+            continue
+        pending.append(paragraph)
+        pending_words += len(paragraph_words)
+    if pending:
+        chunks.append("\n".join(pending))
+    return chunks
+
+class BM25:
+    """Okapi BM25 scores of a query against a small in-memory corpus."""
+
+    def __init__(self, documents: Sequence[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.frequencies = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if documents else 0.0
+        document_frequency = Counter(term for frequencies in self.frequencies for term in frequencies)
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def scores(self, query_terms: set) -> List[float]:
+        """Score of every document for the distinct ``query_terms``."""
+        query_terms = [term for term in query_terms if term in self.idf]
+        scores = []
+        for frequencies, length in zip(self.frequencies, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+            scores.append(sum(self.idf[term] * frequencies[term] * (self.k1 + 1) / (frequencies[term] + norm)
+                              for term in query_terms if term in frequencies))
+        return scores
+
+def select_passages(passages: List[str], scores: List[float], max_tokens: int) -> Optional[str]:
+    """Return the best scoring passages that fit in ``max_tokens``, in page order.
+
+    Passages without a match are left out and gaps between the chosen
+    passages are marked by "...". Returns None if no passage matches.
+    """
+    ranked = sorted((i for i in range(len(passages)) if scores[i] > 0), key=lambda i: (-scores[i], i))
+    chosen, remaining = [], max_tokens
+    for i in ranked:
+        tokens = count_tokens(passages[i]) + 1
+        if tokens <= remaining:
+            chosen.append(i)
+            remaining -= tokens
+    if not chosen:
+        return truncate_to_tokens(passages[ranked[0]], max_tokens) if ranked and max_tokens > 0 else None
+    chosen.sort()
+    selected = passages[chosen[0]]
+    for previous, i in zip(chosen, chosen[1:]):
+        selected += ("\n" if i == previous + 1 else "\n...\n") + passages[i]
+    return selected
+
+## Packing --
+
+def format_source(source: dict, raw_content: Optional[str], max_tokens_per_source: int) -> str:
+    """Format one source in the layout of ``deduplicate_and_format_sources``; ``raw_content`` None leaves it out."""
+    formatted_text = f"{'='*80}\n"  # Clear section separator
+    formatted_text += f"Source: {source['title']}\n"
+    formatted_text += f"{'-'*80}\n"  # Subsection separator
+    formatted_text += f"URL: {source['url']}\n===\n"
+    formatted_text += f"Most relevant content from source: {source['content']}\n===\n"
+    if raw_content is not None:
+        formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
+    formatted_text += f"{'='*80}\n\n" # End section separator
+    return formatted_text
+
+def pack_context(sources: List[dict], max_tokens: int, query: str = "", max_tokens_per_source: int = 4000) -> str:
+    """Format sources into a context of at most ``max_tokens`` tokens.
+
+    The title and snippet of every source and the passages of its page
+    content are scored with BM25 against ``query``, as one corpus. Sources
+    are ranked by their best score, keeping the given order among equally
+    relevant ones. Each source gets its matching passages, best first, up to
+    ``max_tokens_per_source`` and what is left of the budget; sources whose
+    snippet no longer fits are left out. Without a query, sources keep their
+    order and page content is cut to its first tokens.
+
+    Args:
+        sources: Source dicts with title, url, content and raw_content
+        max_tokens: Token budget for the whole formatted text
+        query: What the prompt is about, e.g. a section name and description
+        max_tokens_per_source: Maximum tokens of page content per source
+
+    Returns:
+        str: Formatted string with the sources that fit in the budget
+    """
+    query_terms = terms(query)
+    passages = [chunk_passages(source.get("raw_content") or "") if query_terms else [] for source in sources]
+    source_scores, passage_scores = [0.0] * len(sources), [[] for _ in sources]
+    if query_terms:
+        documents = [f"{source.get('title', '')} {source.get('content', '')}" for source in sources]
+        documents += [passage for source_passages in passages for passage in source_passages]
+        scores = BM25([words(document) for document in documents]).scores(query_terms)
+        offset = len(sources)
+        for i, source_passages in enumerate(passages):
+            passage_scores[i] = scores[offset:offset + len(source_passages)]
+            offset += len(source_passages)
+            source_scores[i] = max([scores[i]] + passage_scores[i])
+    ranked = sorted(range(len(sources)), key=lambda i: (-source_scores[i], i))
+
+    formatted_text = "Content from sources:\n"
+    remaining = max_tokens - count_tokens(formatted_text)
+    for i in ranked:
+        source = sources[i]
+        snippet_tokens = count_tokens(format_source(source, "", max_tokens_per_source))
+        if snippet_tokens > remaining:
+            continue
+        limit = min(max_tokens_per_source, remaining - snippet_tokens)
+        if query_terms:
+            raw_content = select_passages(passages[i], passage_scores[i], limit)
+        else:
+            raw_content = truncate_to_tokens(source.get("raw_content") or "", limit)
+        block = format_source(source, raw_content, max_tokens_per_source)
+        remaining -= count_tokens(block)
+        formatted_text += block
+    return formatted_text.strip()
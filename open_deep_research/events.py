@@ -0,0 +1,68 @@
+"""Typed progress events emitted while a report is researched.
+
+Graph nodes publish these through LangGraph's custom stream
+(``get_stream_writer``); ``OpenDeepResearch.stream_research_report`` yields
+them to callers as the sections of a report finish independently.
+"""
+
+from dataclasses import dataclass, field
+from typing import List
+
+from langgraph.config import get_stream_writer
+
+from open_deep_research.state import Section
+
+@dataclass
+class ResearchEvent:
+    """Base class of all research events."""
+
+@dataclass
+class PlanReady(ResearchEvent):
+    """The report plan was generated (and approved)."""
+    sections: List[Section]
+
+@dataclass
+class SectionStarted(ResearchEvent):
+    """Work on a section began."""
+    section_name: str
+    research: bool = True
+
+@dataclass
+class SearchDone(ResearchEvent):
+    """A round of web searches for a section finished."""
+    section_name: str
+    queries: List[str]
+    iteration: int
+    source_chars: int
+
+@dataclass
+class SectionDrafted(ResearchEvent):
+    """A draft of a researched section was written."""
+    section_name: str
+    content: str
+    iteration: int
+
+@dataclass
+class SectionGraded(ResearchEvent):
+    """A section draft was graded; a failing grade comes with follow-up queries."""
+    section_name: str
+    grade: str
+    follow_up_queries: List[str] = field(default_factory=list)
+
+@dataclass
+class SectionCompleted(ResearchEvent):
+    """A section is final and will appear in the report as is."""
+    section: Section
+
+@dataclass
+class FinalReport(ResearchEvent):
+    """The compiled report."""
+    report: str
+    cached: bool = False
+
+def emit(event: ResearchEvent):
+    """Publish ``event`` on the custom stream of the running graph.
+
+    A no-op unless the graph is streamed with ``stream_mode="custom"``.
+    """
+    get_stream_writer()(event)
@@ -1,6 +1,6 @@
-from typing import Literal
+import asyncio
+from typing import Literal, Optional
 
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 
@@ -12,9 +12,11 @@ from open_deep_research.state import (
     ReportStateInput,
     ReportStateOutput,
     Sections,
+    BatchedQueries,
     ReportState,
     SectionState,
     SectionOutputState,
+    SectionPatch,
     Queries,
     Feedback
 )
@@ -23,18 +25,44 @@ from open_deep_research.prompts import (
     report_planner_query_writer_instructions,
     report_planner_instructions,
     query_writer_instructions, 
+    query_writer_inputs,
+    batched_query_writer_instructions,
     section_writer_instructions,
     final_section_writer_instructions,
+    final_section_writer_inputs,
     section_grader_instructions,
+    section_grader_inputs,
+    section_reviser_instructions,
+    section_reviser_inputs,
     section_writer_inputs
 )
 
+from open_deep_research.budget import get_research_budget
 from open_deep_research.configuration import Configuration
+from open_deep_research.context import pack_context
+from open_deep_research.events import (
+    emit,
+    FinalReport,
+    PlanReady,
+    SearchDone,
+    SectionCompleted,
+    SectionDrafted,
+    SectionGraded,
+    SectionStarted
+)
+from open_deep_research.metrics import SEARCH_QUERIES_SAVED, SECTION_REVISIONS, timed_node
+from open_deep_research.models import get_chat_model
 from open_deep_research.utils import (
+    apply_section_patch,
+    collect_sources,
+    execute_search,
+    format_search_results,
     format_sections, 
     get_config_value, 
+    get_search_coalescer,
     get_search_params, 
-    select_and_execute_search
+    merge_sources,
+    select_relevant_sources
 )
 
 ## Nodes -- 
@@ -69,6 +97,9 @@ async def generate_report_plan(state: ReportState, config: RunnableConfig):
     configurable = Configuration.from_runnable_config(config)
     report_structure = configurable.report_structure
     number_of_queries = configurable.number_of_queries
+    budget = get_research_budget(config)
+    if budget is not None:
+        number_of_queries = budget.number_of_queries(number_of_queries)
     search_api = get_config_value(configurable.search_api)
     search_api_config = configurable.search_api_config or {}  # Get the config dict, default to empty
     params_to_pass = get_search_params(search_api, search_api_config)  # Filter parameters
@@ -81,8 +112,7 @@ async def generate_report_plan(state: ReportState, config: RunnableConfig):
     writer_provider = get_config_value(configurable.writer_provider)
     writer_model_name = get_config_value(configurable.writer_model)
     writer_model_kwargs = get_config_value(configurable.writer_model_kwargs or {})
-    writer_model = init_chat_model(model=writer_model_name, model_provider=writer_provider, model_kwargs=writer_model_kwargs) 
-    structured_llm = writer_model.with_structured_output(Queries)
+    structured_llm = get_chat_model(model=writer_model_name, model_provider=writer_provider, schema=Queries, model_kwargs=writer_model_kwargs)
 
     # Format system instructions
     system_instructions_query = report_planner_query_writer_instructions.format(topic=topic, report_organization=report_structure, number_of_queries=number_of_queries)
@@ -95,7 +125,10 @@ async def generate_report_plan(state: ReportState, config: RunnableConfig):
     query_list = [query.search_query for query in results.queries]
 
     # Search the web with parameters
-    source_str = await select_and_execute_search(search_api, query_list, params_to_pass)
+    search_results = await execute_search(search_api, query_list, params_to_pass, get_search_coalescer(config))
+    # Ranking passages is CPU-bound, keep it off the event loop
+    source_str = await asyncio.to_thread(format_search_results, search_results, configurable.planning_context_tokens, 
+                                         " ".join([topic] + query_list))
 
     # Format system instructions
     system_instructions_sections = report_planner_instructions.format(topic=topic, report_organization=report_structure, context=source_str, feedback=feedback)
@@ -112,28 +145,80 @@ async def generate_report_plan(state: ReportState, config: RunnableConfig):
     # Run the planner
     if planner_model == "claude-3-7-sonnet-latest":
         # Allocate a thinking budget for claude-3-7-sonnet-latest as the planner model
-        planner_llm = init_chat_model(model=planner_model, 
-                                      model_provider=planner_provider, 
-                                      max_tokens=20_000, 
-                                      thinking={"type": "enabled", "budget_tokens": 16_000})
+        structured_llm = get_chat_model(model=planner_model, 
+                                        model_provider=planner_provider, 
+                                        schema=Sections,
+                                        max_tokens=20_000, 
+                                        thinking={"type": "enabled", "budget_tokens": 16_000})
 
     else:
         # With other models, thinking tokens are not specifically allocated
-        planner_llm = init_chat_model(model=planner_model, 
-                                      model_provider=planner_provider,
-                                      model_kwargs=planner_model_kwargs)
+        structured_llm = get_chat_model(model=planner_model, 
+                                        model_provider=planner_provider,
+                                        schema=Sections,
+                                        model_kwargs=planner_model_kwargs)
     
     # Generate the report sections
-    structured_llm = planner_llm.with_structured_output(Sections)
     report_sections = await structured_llm.ainvoke([SystemMessage(content=system_instructions_sections),
                                              HumanMessage(content=planner_message)])
 
     # Get sections
     sections = report_sections.sections
 
+    # Keep the planning sources so section research can start from them
+    if configurable.reuse_planning_sources:
+        return {"sections": sections, "planning_sources": collect_sources(search_results)}
+
     return {"sections": sections}
 
-def human_feedback(state: ReportState, config: RunnableConfig) -> Command[Literal["generate_report_plan","build_section_with_web_research"]]:
+def initiate_section_research(state: ReportState, config: RunnableConfig) -> list[Send]:
+    """Create parallel research tasks for every section that needs research.
+    
+    Sections with queries in ``section_queries`` start with those instead of
+    generating their own. With ``reuse_planning_sources`` each section also
+    receives the planning sources relevant to its name and description as
+    ``seed_sources``, at most ``planning_sources_to_skip_search`` of them.
+    """
+    sections = state["sections"]
+    emit(PlanReady(sections=[s.model_copy() for s in sections]))
+    section_queries = state.get("section_queries") or {}
+    planning_sources = state.get("planning_sources") or []
+    seed_limit = Configuration.from_runnable_config(config).planning_sources_to_skip_search
+
+    sends = []
+    for s in sections:
+        if not s.research:
+            continue
+        section_state = {"topic": state["topic"], "section": s, "search_iterations": 0}
+        if s.name in section_queries:
+            section_state["search_queries"] = section_queries[s.name]
+        if planning_sources:
+            section_state["seed_sources"] = select_relevant_sources(planning_sources, f"{s.name} {s.description}", seed_limit)
+        sends.append(Send("build_section_with_web_research", section_state))
+    return sends
+
+def route_report_plan(state: ReportState, config: RunnableConfig):
+    """Route a generated report plan to human review or straight to research.
+    
+    With ``auto_approve_plan`` the plan is accepted as generated: sections are
+    researched without an interrupt, so the graph runs to completion in one
+    call and needs no checkpointer.
+    
+    Args:
+        state: Current graph state with the generated sections
+        config: Configuration for the workflow
+        
+    Returns:
+        "human_feedback", "generate_section_queries" or Send commands for parallel section research
+    """
+    configurable = Configuration.from_runnable_config(config)
+    if not configurable.auto_approve_plan:
+        return "human_feedback"
+    if configurable.batch_section_queries:
+        return "generate_section_queries"
+    return initiate_section_research(state, config)
+
+def human_feedback(state: ReportState, config: RunnableConfig) -> Command[Literal["generate_report_plan","generate_section_queries","build_section_with_web_research"]]:
     """Get human feedback on the report plan and route to next steps.
     
     This node:
@@ -152,7 +237,6 @@ def human_feedback(state: ReportState, config: RunnableConfig) -> Command[Litera
     """
 
     # Get sections
-    topic = state["topic"]
     sections = state['sections']
     sections_str = "\n\n".join(
         f"Section: {section.name}\n"
@@ -171,11 +255,9 @@ def human_feedback(state: ReportState, config: RunnableConfig) -> Command[Litera
     # If the user approves the report plan, kick off section writing
     if isinstance(feedback, bool) and feedback is True:
         # Treat this as approve and kick off section writing
-        return Command(goto=[
-            Send("build_section_with_web_research", {"topic": topic, "section": s, "search_iterations": 0}) 
-            for s in sections 
-            if s.research
-        ])
+        if Configuration.from_runnable_config(config).batch_section_queries:
+            return Command(goto="generate_section_queries")
+        return Command(goto=initiate_section_research(state, config))
     
     # If the user provides feedback, regenerate the report plan 
     elif isinstance(feedback, str):
@@ -185,6 +267,79 @@ def human_feedback(state: ReportState, config: RunnableConfig) -> Command[Litera
     else:
         raise TypeError(f"Interrupt value of type {type(feedback)} is not supported.")
     
+async def generate_section_queries(state: ReportState, config: RunnableConfig):
+    """Generate the search queries of every research section in one call.
+    
+    Used with ``batch_section_queries``: instead of a ``generate_queries``
+    call per section, all carrying the same topic and instructions, one
+    structured output call covers the whole plan and every section receives
+    its queries through ``Send``. Sections the model leaves out generate
+    their own queries as usual.
+    
+    Args:
+        state: Current graph state with the approved sections
+        config: Configuration including number of queries to generate
+        
+    Returns:
+        Dict containing the search queries per section name
+    """
+
+    # Get state 
+    topic = state["topic"]
+    sections = [s for s in state["sections"] if s.research]
+
+    # Get configuration
+    configurable = Configuration.from_runnable_config(config)
+    number_of_queries = configurable.number_of_queries
+    budget = get_research_budget(config)
+    if budget is not None:
+        number_of_queries = budget.number_of_queries(number_of_queries)
+
+    # Generate queries 
+    writer_provider = get_config_value(configurable.writer_provider)
+    writer_model_name = get_config_value(configurable.writer_model)
+    writer_model_kwargs = get_config_value(configurable.writer_model_kwargs or {})
+    structured_llm = get_chat_model(model=writer_model_name, model_provider=writer_provider, schema=BatchedQueries, model_kwargs=writer_model_kwargs)
+
+    # Format system instructions
+    sections_str = "\n".join(
+        f"Section: {section.name}\n"
+        f"Description: {section.description}\n"
+        for section in sections
+    )
+    system_instructions = batched_query_writer_instructions.format(topic=topic, 
+                                                                   sections=sections_str, 
+                                                                   number_of_queries=number_of_queries)
+
+    # Generate queries  
+    results = await structured_llm.ainvoke([SystemMessage(content=system_instructions),
+                                     HumanMessage(content="Generate search queries for every section of the report.")])
+
+    # Keep queries for known sections only
+    names = {section.name for section in sections}
+    section_queries = {item.section_name: item.queries for item in results.sections
+                       if item.section_name in names and item.queries}
+
+    return {"section_queries": section_queries}
+
+def seed_sources_cover_section(seed_sources: list, configurable: Configuration) -> bool:
+    """Whether the planning sources of a section are enough to skip its first search."""
+    return bool(seed_sources) and len(seed_sources) >= configurable.planning_sources_to_skip_search
+
+def route_section_start(state: SectionState, config: RunnableConfig):
+    """Start researching a section.
+    
+    Query generation is skipped if the section's queries came with the Send,
+    or if its planning sources cover it and the first search is skipped anyway.
+    """
+    section = state["section"]
+    emit(SectionStarted(section_name=section.name))
+    if state.get("search_queries"):
+        return "search_web"
+    if seed_sources_cover_section(state.get("seed_sources"), Configuration.from_runnable_config(config)):
+        return "search_web"
+    return "generate_queries"
+
 async def generate_queries(state: SectionState, config: RunnableConfig):
     """Generate search queries for researching a specific section.
     
@@ -206,22 +361,25 @@ async def generate_queries(state: SectionState, config: RunnableConfig):
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
     number_of_queries = configurable.number_of_queries
+    budget = get_research_budget(config)
+    if budget is not None:
+        # Fewer queries mean fewer searches and a shorter context to write from
+        number_of_queries = budget.number_of_queries(number_of_queries)
 
     # Generate queries 
     writer_provider = get_config_value(configurable.writer_provider)
     writer_model_name = get_config_value(configurable.writer_model)
     writer_model_kwargs = get_config_value(configurable.writer_model_kwargs or {})
-    writer_model = init_chat_model(model=writer_model_name, model_provider=writer_provider, model_kwargs=writer_model_kwargs) 
-    structured_llm = writer_model.with_structured_output(Queries)
+    structured_llm = get_chat_model(model=writer_model_name, model_provider=writer_provider, schema=Queries, model_kwargs=writer_model_kwargs)
 
-    # Format system instructions
-    system_instructions = query_writer_instructions.format(topic=topic, 
-                                                           section_topic=section.description, 
-                                                           number_of_queries=number_of_queries)
+    # Format system instructions, shared by all sections, and the section's request
+    system_instructions = query_writer_instructions.format(topic=topic)
+    query_writer_inputs_formatted = query_writer_inputs.format(section_topic=section.description, 
+                                                               number_of_queries=number_of_queries)
 
     # Generate queries  
     queries = await structured_llm.ainvoke([SystemMessage(content=system_instructions),
-                                     HumanMessage(content="Generate search queries on the provided topic.")])
+                                     HumanMessage(content=query_writer_inputs_formatted)])
 
     return {"search_queries": queries.queries}
 
@@ -233,6 +391,14 @@ async def search_web(state: SectionState, config: RunnableConfig):
     2. Executes searches using configured search API
     3. Formats results into usable context
     
+    In the first round, planning sources seeded into the section are added to
+    the results. When there are at least ``planning_sources_to_skip_search``
+    of them no search is run; fewer seeds save one of the queries.
+    
+    Sources accumulate over the search rounds of a section: new results are
+    merged with the earlier ones by URL, and the sources and passages most
+    relevant to the section are packed into ``section_context_tokens``.
+    
     Args:
         state: Current state with search queries
         config: Search API configuration
@@ -242,7 +408,10 @@ async def search_web(state: SectionState, config: RunnableConfig):
     """
 
     # Get state
-    search_queries = state["search_queries"]
+    section = state["section"]
+    search_queries = state.get("search_queries") or []
+    seed_sources = (state.get("seed_sources") or []) if state["search_iterations"] == 0 else []
+    earlier_sources = state.get("sources") or []
 
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
@@ -252,11 +421,74 @@ async def search_web(state: SectionState, config: RunnableConfig):
 
     # Web search
     query_list = [query.search_query for query in search_queries]
+    # What the section's sources are ranked against
+    subject = " ".join([section.name, section.description] + query_list)
+
+    # Let the planning sources stand in for all or one of the queries
+    if seed_sources_cover_section(seed_sources, configurable):
+        SEARCH_QUERIES_SAVED.inc(len(query_list) or configurable.number_of_queries)
+        query_list = []
+    elif seed_sources and len(query_list) > 1:
+        SEARCH_QUERIES_SAVED.inc()
+        query_list = query_list[:-1]
 
     # Search the web with parameters
-    source_str = await select_and_execute_search(search_api, query_list, params_to_pass)
+    search_results = await execute_search(search_api, query_list, params_to_pass, get_search_coalescer(config)) if query_list else []
+    if seed_sources:
+        # Seeds only exist for backends returning structured results
+        search_results = [{"results": seed_sources}] + search_results
+    if isinstance(search_results, str):
+        # Backends returning formatted text cannot be merged with earlier results
+        source_str = format_search_results(search_results, configurable.section_context_tokens)
+        update = {}
+    else:
+        sources = merge_sources(earlier_sources, search_results)
+        # Ranking passages is CPU-bound, keep it off the event loop
+        source_str = await asyncio.to_thread(pack_context, sources, configurable.section_context_tokens, subject)
+        update = {"sources": sources, "new_source_count": len(sources) - len(earlier_sources)}
+    emit(SearchDone(section_name=section.name, queries=query_list,
+                    iteration=state["search_iterations"] + 1, source_chars=len(source_str)))
+
+    return {"source_str": source_str, "search_iterations": state["search_iterations"] + 1, **update}
 
-    return {"source_str": source_str, "search_iterations": state["search_iterations"] + 1}
+async def revise_section(state: SectionState, configurable: Configuration) -> Optional[str]:
+    """Patch a section draft with the sources found by the last search round.
+    
+    Instead of writing the section again from all sources, the writer gets
+    the draft, the follow-up queries of the grader and only the new sources,
+    and returns targeted edits.
+    
+    Args:
+        state: Current state with the draft, follow-up queries and sources
+        configurable: Configuration for the writer model
+        
+    Returns:
+        The revised section, or None if the edits do not apply to the draft
+    """
+    section = state["section"]
+    gaps = "\n".join(f"- {query.search_query}" for query in state["search_queries"])
+    new_source_count = state.get("new_source_count")
+    if new_source_count is None:
+        # Backends returning formatted text only provide the sources of the last round
+        context = state["source_str"]
+    else:
+        context = await asyncio.to_thread(pack_context, state["sources"][:new_source_count], configurable.section_context_tokens,
+                                          f"{section.name} {section.description}\n{gaps}")
+    section_reviser_inputs_formatted = section_reviser_inputs.format(topic=state["topic"], 
+                                                                     section_name=section.name, 
+                                                                     section_topic=section.description, 
+                                                                     section_content=section.content, 
+                                                                     gaps=gaps, 
+                                                                     context=context)
+
+    writer_provider = get_config_value(configurable.writer_provider)
+    writer_model_name = get_config_value(configurable.writer_model)
+    writer_model_kwargs = get_config_value(configurable.writer_model_kwargs or {})
+    reviser_model = get_chat_model(model=writer_model_name, model_provider=writer_provider, schema=SectionPatch, model_kwargs=writer_model_kwargs)
+
+    patch = await reviser_model.ainvoke([SystemMessage(content=section_reviser_instructions),
+                                         HumanMessage(content=section_reviser_inputs_formatted)])
+    return apply_section_patch(section.content, patch)
 
 async def write_section(state: SectionState, config: RunnableConfig) -> Command[Literal[END, "search_web"]]:
     """Write a section of the report and evaluate if more research is needed.
@@ -268,6 +500,11 @@ async def write_section(state: SectionState, config: RunnableConfig) -> Command[
        - Completes the section if quality passes
        - Triggers more research if quality fails
     
+    With ``delta_section_revisions`` a draft that failed its grade is patched
+    with the new sources by ``revise_section`` rather than written again,
+    falling back to a rewrite if the patch does not apply. If the follow-up
+    search found no new sources, the draft is published as it is.
+    
     Args:
         state: Current state with search results and section info
         config: Configuration for writing and evaluation
@@ -283,35 +520,56 @@ async def write_section(state: SectionState, config: RunnableConfig) -> Command[
 
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
-
-    # Format system instructions
-    section_writer_inputs_formatted = section_writer_inputs.format(topic=topic, 
-                                                             section_name=section.name, 
-                                                             section_topic=section.description, 
-                                                             context=source_str, 
-                                                             section_content=section.content)
-
-    # Generate section  
-    writer_provider = get_config_value(configurable.writer_provider)
-    writer_model_name = get_config_value(configurable.writer_model)
-    writer_model_kwargs = get_config_value(configurable.writer_model_kwargs or {})
-    writer_model = init_chat_model(model=writer_model_name, model_provider=writer_provider, model_kwargs=writer_model_kwargs) 
-
-    section_content = await writer_model.ainvoke([SystemMessage(content=section_writer_instructions),
-                                           HumanMessage(content=section_writer_inputs_formatted)])
-    
-    # Write content to the section object  
-    section.content = section_content.content
+    revision = state["search_iterations"] > 1 and bool(section.content)
+
+    # Patch a failed draft with what the follow-up search found
+    revised_content = None
+    if revision and configurable.delta_section_revisions:
+        if state.get("new_source_count") == 0:
+            # Nothing new to add: the draft is as good as it gets
+            emit(SectionCompleted(section=section.model_copy()))
+            return Command(update={"completed_sections": [section]}, goto=END)
+        revised_content = await revise_section(state, configurable)
+
+    if revised_content is not None:
+        section.content = revised_content
+    else:
+        # Format system instructions
+        section_writer_inputs_formatted = section_writer_inputs.format(topic=topic, 
+                                                                 section_name=section.name, 
+                                                                 section_topic=section.description, 
+                                                                 context=source_str, 
+                                                                 section_content=section.content)
+
+        # Generate section  
+        writer_provider = get_config_value(configurable.writer_provider)
+        writer_model_name = get_config_value(configurable.writer_model)
+        writer_model_kwargs = get_config_value(configurable.writer_model_kwargs or {})
+        writer_model = get_chat_model(model=writer_model_name, model_provider=writer_provider, model_kwargs=writer_model_kwargs)
+
+        section_content = await writer_model.ainvoke([SystemMessage(content=section_writer_instructions),
+                                               HumanMessage(content=section_writer_inputs_formatted)])
+        
+        # Write content to the section object  
+        section.content = section_content.content
+    if revision:
+        SECTION_REVISIONS.inc(mode="delta" if revised_content is not None else "rewrite")
+    emit(SectionDrafted(section_name=section.name, content=section.content, iteration=state["search_iterations"]))
+
+    # Close to the deadline the draft is published as is rather than graded
+    budget = get_research_budget(config)
+    if budget is not None and not budget.allow_reflection(section.name):
+        emit(SectionCompleted(section=section.model_copy()))
+        return Command(update={"completed_sections": [section]}, goto=END)
 
     # Grade prompt 
-    section_grader_message = ("Grade the report and consider follow-up questions for missing information. "
-                              "If the grade is 'pass', return empty strings for all follow-up queries. "
-                              "If the grade is 'fail', provide specific search queries to gather missing information.")
-    
-    section_grader_instructions_formatted = section_grader_instructions.format(topic=topic, 
-                                                                               section_topic=section.description,
-                                                                               section=section.content, 
-                                                                               number_of_follow_up_queries=configurable.number_of_queries)
+    number_of_follow_up_queries = configurable.number_of_queries
+    if budget is not None:
+        number_of_follow_up_queries = budget.number_of_queries(number_of_follow_up_queries)
+    section_grader_instructions_formatted = section_grader_instructions.format(topic=topic)
+    section_grader_inputs_formatted = section_grader_inputs.format(section_topic=section.description,
+                                                                   section=section.content, 
+                                                                   number_of_follow_up_queries=number_of_follow_up_queries)
 
     # Use planner model for reflection
     planner_provider = get_config_value(configurable.planner_provider)
@@ -320,20 +578,26 @@ async def write_section(state: SectionState, config: RunnableConfig) -> Command[
 
     if planner_model == "claude-3-7-sonnet-latest":
         # Allocate a thinking budget for claude-3-7-sonnet-latest as the planner model
-        reflection_model = init_chat_model(model=planner_model, 
-                                           model_provider=planner_provider, 
-                                           max_tokens=20_000, 
-                                           thinking={"type": "enabled", "budget_tokens": 16_000}).with_structured_output(Feedback)
+        reflection_model = get_chat_model(model=planner_model, 
+                                          model_provider=planner_provider, 
+                                          schema=Feedback,
+                                          max_tokens=20_000, 
+                                          thinking={"type": "enabled", "budget_tokens": 16_000})
     else:
-        reflection_model = init_chat_model(model=planner_model, 
-                                           model_provider=planner_provider, model_kwargs=planner_model_kwargs).with_structured_output(Feedback)
+        reflection_model = get_chat_model(model=planner_model, 
+                                          model_provider=planner_provider, schema=Feedback, model_kwargs=planner_model_kwargs)
     # Generate feedback
     feedback = await reflection_model.ainvoke([SystemMessage(content=section_grader_instructions_formatted),
-                                        HumanMessage(content=section_grader_message)])
-
-    # If the section is passing or the max search depth is reached, publish the section to completed sections 
-    if feedback.grade == "pass" or state["search_iterations"] >= configurable.max_search_depth:
+                                        HumanMessage(content=section_grader_inputs_formatted)])
+    emit(SectionGraded(section_name=section.name, grade=feedback.grade,
+                       follow_up_queries=[q.search_query for q in feedback.follow_up_queries]))
+
+    # If the section is passing, the max search depth is reached or there is no time
+    # left for another search round, publish the section to completed sections 
+    if (feedback.grade == "pass" or state["search_iterations"] >= configurable.max_search_depth
+            or (budget is not None and not budget.allow_reflection(section.name))):
         # Publish the section to completed sections 
+        emit(SectionCompleted(section=section.model_copy()))
         return  Command(
         update={"completed_sections": [section]},
         goto=END
@@ -367,21 +631,24 @@ async def write_final_sections(state: SectionState, config: RunnableConfig):
     topic = state["topic"]
     section = state["section"]
     completed_report_sections = state["report_sections_from_research"]
+    emit(SectionStarted(section_name=section.name, research=False))
     
-    # Format system instructions
-    system_instructions = final_section_writer_instructions.format(topic=topic, section_name=section.name, section_topic=section.description, context=completed_report_sections)
+    # Format system instructions, shared by all final sections, and the section's request
+    system_instructions = final_section_writer_instructions.format(topic=topic, context=completed_report_sections)
+    final_section_writer_inputs_formatted = final_section_writer_inputs.format(section_name=section.name, section_topic=section.description)
 
     # Generate section  
     writer_provider = get_config_value(configurable.writer_provider)
     writer_model_name = get_config_value(configurable.writer_model)
     writer_model_kwargs = get_config_value(configurable.writer_model_kwargs or {})
-    writer_model = init_chat_model(model=writer_model_name, model_provider=writer_provider, model_kwargs=writer_model_kwargs) 
+    writer_model = get_chat_model(model=writer_model_name, model_provider=writer_provider, model_kwargs=writer_model_kwargs)
     
     section_content = await writer_model.ainvoke([SystemMessage(content=system_instructions),
-                                           HumanMessage(content="Generate a report section based on the provided sources.")])
+                                           HumanMessage(content=final_section_writer_inputs_formatted)])
     
     # Write content to section 
     section.content = section_content.content
+    emit(SectionCompleted(section=section.model_copy()))
 
     # Write the updated section to completed sections
     return {"completed_sections": [section]}
@@ -432,6 +699,7 @@ def compile_final_report(state: ReportState):
 
     # Compile final report
     all_sections = "\n\n".join([s.content for s in sections])
+    emit(FinalReport(report=all_sections))
 
     return {"final_report": all_sections}
 
@@ -457,14 +725,14 @@ def initiate_final_section_writing(state: ReportState):
 
 # Report section sub-graph -- 
 
-# Add nodes 
+# Add nodes (each wrapped to record its latency in the metrics registry)
 section_builder = StateGraph(SectionState, output=SectionOutputState)
-section_builder.add_node("generate_queries", generate_queries)
-section_builder.add_node("search_web", search_web)
-section_builder.add_node("write_section", write_section)
+section_builder.add_node("generate_queries", timed_node("generate_queries")(generate_queries))
+section_builder.add_node("search_web", timed_node("search_web")(search_web))
+section_builder.add_node("write_section", timed_node("write_section")(write_section))
 
 # Add edges
-section_builder.add_edge(START, "generate_queries")
+section_builder.add_conditional_edges(START, route_section_start, ["generate_queries", "search_web"])
 section_builder.add_edge("generate_queries", "search_web")
 section_builder.add_edge("search_web", "write_section")
 
@@ -472,19 +740,28 @@ section_builder.add_edge("search_web", "write_section")
 
 # Add nodes
 builder = StateGraph(ReportState, input=ReportStateInput, output=ReportStateOutput, config_schema=Configuration)
-builder.add_node("generate_report_plan", generate_report_plan)
-builder.add_node("human_feedback", human_feedback)
+builder.add_node("generate_report_plan", timed_node("generate_report_plan")(generate_report_plan))
+builder.add_node("human_feedback", timed_node("human_feedback")(human_feedback))
+builder.add_node("generate_section_queries", timed_node("generate_section_queries")(generate_section_queries))
 builder.add_node("build_section_with_web_research", section_builder.compile())
-builder.add_node("gather_completed_sections", gather_completed_sections)
-builder.add_node("write_final_sections", write_final_sections)
-builder.add_node("compile_final_report", compile_final_report)
+builder.add_node("gather_completed_sections", timed_node("gather_completed_sections")(gather_completed_sections))
+builder.add_node("write_final_sections", timed_node("write_final_sections")(write_final_sections))
+builder.add_node("compile_final_report", timed_node("compile_final_report")(compile_final_report))
 
 # Add edges
 builder.add_edge(START, "generate_report_plan")
-builder.add_edge("generate_report_plan", "human_feedback")
+builder.add_conditional_edges("generate_report_plan", route_report_plan, ["human_feedback", "generate_section_queries", "build_section_with_web_research"])
+builder.add_conditional_edges("generate_section_queries", initiate_section_research, ["build_section_with_web_research"])
 builder.add_edge("build_section_with_web_research", "gather_completed_sections")
 builder.add_conditional_edges("gather_completed_sections", initiate_final_section_writing, ["write_final_sections"])
 builder.add_edge("write_final_sections", "compile_final_report")
 builder.add_edge("compile_final_report", END)
 
-graph = builder.compile()
+def __getattr__(name):
+    # Compile the default graph on first access instead of on import; callers
+    # that only need the builder (odr.py compiles its own, shared graph) never
+    # pay for a throwaway compile.
+    if name == "graph":
+        globals()["graph"] = builder.compile()
+        return globals()["graph"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,356 @@
+"""Process metrics in the Prometheus text format.
+
+A small dependency-free registry of counters, gauges and histograms, a
+callback handler counting LLM calls and tokens, a node timing wrapper for
+graph nodes, an event-loop lag probe and an asyncio HTTP server exposing
+everything on ``/metrics``.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import functools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+REPORT_BUCKETS = (5, 10, 30, 60, 120, 180, 300, 600, 900, 1800, 3600)
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    """Base class of a labelled metric family."""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """A monotonically increasing value per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+class Gauge(Metric):
+    """A value that goes up and down, optionally read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the (unlabelled) value from ``function`` whenever metrics are scraped."""
+        self._function = function
+
+    def value(self, **labels) -> float:
+        if self._function is not None and not labels:
+            return self._function()
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception as e:
+                logger.warning(f"Failed to read gauge {self.name}: {str(e)}")
+                return []
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count of observed values per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            # One count per bucket, then sum and count
+            state = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(_label_key(labels))
+        return int(state[-1]) if state else 0
+
+    def sum(self, **labels) -> float:
+        state = self._values.get(_label_key(labels))
+        return state[-2] if state else 0.0
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {_format_value(state[i])}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(state[-1])}")
+        return lines
+
+class Registry:
+    """A named collection of metrics rendered together.
+
+    Registering a name twice returns the existing metric, so modules that
+    are imported under two names (``graph`` and ``open_deep_research.graph``)
+    share their metrics instead of failing.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, documentation: str, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter, name, documentation)
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge, name, documentation)
+
+    def histogram(self, name: str, documentation: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+REGISTRY = Registry()
+
+## Research pipeline metrics --
+
+NODE_SECONDS = REGISTRY.histogram("odr_node_duration_seconds", "Duration of research graph node runs.")
+NODE_ERRORS = REGISTRY.counter("odr_node_errors_total", "Research graph node runs that raised.")
+LLM_CALLS = REGISTRY.counter("odr_llm_calls_total", "Chat model calls by provider and model.")
+LLM_ERRORS = REGISTRY.counter("odr_llm_errors_total", "Failed chat model calls by provider and model.")
+LLM_TOKENS = REGISTRY.counter("odr_llm_tokens_total", "Chat model tokens by provider, model and direction (input/output).")
+LLM_CACHED_TOKENS = REGISTRY.counter("odr_llm_cached_input_tokens_total",
+                                     "Input tokens read from the provider's prompt cache, by provider and model.")
+LLM_SECONDS = REGISTRY.histogram("odr_llm_duration_seconds", "Duration of chat model calls by provider and model.")
+SEARCH_CALLS = REGISTRY.counter("odr_search_calls_total", "Search backend calls by backend.")
+SEARCH_ERRORS = REGISTRY.counter("odr_search_errors_total", "Failed search backend calls by backend.")
+SEARCH_QUERIES = REGISTRY.counter("odr_search_queries_total", "Search queries sent by backend.")
+SEARCH_QUERIES_SAVED = REGISTRY.counter("odr_search_queries_saved_total", "Section search queries answered from planning sources instead.")
+SEARCH_SECONDS = REGISTRY.histogram("odr_search_duration_seconds", "Duration of search backend calls by backend.")
+SECTION_REVISIONS = REGISTRY.counter("odr_section_revisions_total", "Section drafts revised after a failed grade, by mode (delta/rewrite).")
+EVENT_LOOP_LAG = REGISTRY.histogram("odr_event_loop_lag_seconds", "Delay of event loop wake-ups beyond their schedule.",
+                                    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+
+def timed_node(name: str):
+    """Wrap a graph node so every run records its duration in ``odr_node_duration_seconds``.
+
+    Works for sync and async nodes. LangGraph inspects a node's signature to
+    decide whether to pass ``config``, which ``functools.wraps`` preserves.
+    """
+    def decorator(node):
+        if asyncio.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await node(*args, **kwargs)
+                except Exception:
+                    NODE_ERRORS.inc(node=name)
+                    raise
+                finally:
+                    NODE_SECONDS.observe(time.perf_counter() - started, node=name)
+            return async_wrapper
+
+        @functools.wraps(node)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return node(*args, **kwargs)
+            except Exception:
+                NODE_ERRORS.inc(node=name)
+                raise
+            finally:
+                NODE_SECONDS.observe(time.perf_counter() - started, node=name)
+        return wrapper
+    return decorator
+
+def _usage_from_result(response: LLMResult) -> Tuple[int, int]:
+    """Return (input, output) tokens reported for an LLM result, 0 when not reported."""
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+    if not input_tokens and not output_tokens:
+        # Older integrations only report usage in llm_output
+        usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage") or {}
+        input_tokens = usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+        output_tokens = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+    return input_tokens, output_tokens
+
+def _cached_tokens_from_result(response: LLMResult) -> int:
+    """Return the input tokens an LLM result reports as read from the provider's prompt cache."""
+    cached = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                cached += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    if not cached:
+        # DeepSeek reports its prompt cache hits in a field of its own
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        cached = usage.get("prompt_cache_hit_tokens") or 0
+    return cached
+
+class LLMMetricsCallback(AsyncCallbackHandler):
+    """Count chat model calls, errors, latency and tokens per provider and model.
+
+    Pass it in the ``callbacks`` of a graph run; LangChain propagates it to
+    every model call made inside the nodes.
+    """
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[Dict[str, str], float]] = {}
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID,
+                                  metadata: Optional[Dict[str, Any]] = None, **kwargs):
+        metadata = metadata or {}
+        labels = {
+            "provider": metadata.get("ls_provider") or "unknown",
+            "model": metadata.get("ls_model_name") or "unknown",
+        }
+        self._runs[run_id] = (labels, time.perf_counter())
+        LLM_CALLS.inc(**labels)
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        labels, started = run
+        LLM_SECONDS.observe(time.perf_counter() - started, **labels)
+        input_tokens, output_tokens = _usage_from_result(response)
+        if input_tokens:
+            LLM_TOKENS.inc(input_tokens, direction="input", **labels)
+        if output_tokens:
+            LLM_TOKENS.inc(output_tokens, direction="output", **labels)
+        cached_tokens = _cached_tokens_from_result(response)
+        if cached_tokens:
+            LLM_CACHED_TOKENS.inc(cached_tokens, **labels)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        labels, started = run
+        LLM_SECONDS.observe(time.perf_counter() - started, **labels)
+        LLM_ERRORS.inc(**labels)
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Record how late the event loop wakes up a sleeper, until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - scheduled))
+
+async def _handle_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, registry: Registry):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=10)
+        # Drain the headers
+        while (await asyncio.wait_for(reader.readline(), timeout=10)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+            body = registry.render().encode("utf-8")
+        else:
+            status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"Not Found\n"
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def start_metrics_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> asyncio.AbstractServer:
+    """Serve ``registry`` in the Prometheus text format on ``http://host:port/metrics``."""
+    server = await asyncio.start_server(lambda r, w: _handle_request(r, w, registry), host, port)
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
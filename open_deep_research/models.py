@@ -0,0 +1,98 @@
+"""Process-wide cache of chat model clients.
+
+``init_chat_model`` builds a new client, with its own HTTP connection pool,
+every time it is called. The graph nodes used to call it on every run, so
+every section paid for client construction and a fresh TLS handshake.
+``get_chat_model`` returns one shared instance per provider, model, model
+arguments and structured output schema or bound tools, so model calls reuse
+kept-alive connections.
+
+HTTP connection pools belong to the event loop that opened them, so models
+are cached per running loop.
+"""
+
+import json
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Sequence
+from weakref import WeakKeyDictionary
+
+from langchain.chat_models import init_chat_model
+from langchain_core.runnables import Runnable
+
+from open_deep_research.metrics import REGISTRY
+
+MODELS_CREATED = REGISTRY.counter("odr_chat_models_created_total", "Chat model clients created, by provider and model.")
+MODEL_LOOKUPS = REGISTRY.counter("odr_chat_model_lookups_total", "Chat model lookups by result (hit/miss).")
+
+def _freeze(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=repr)
+
+class ModelRegistry:
+    """Chat models and their structured output and tool-calling variants, created once per event loop."""
+
+    def __init__(self):
+        self._by_loop: "WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, Runnable]]" = WeakKeyDictionary()
+        # Models requested outside of a running loop
+        self._no_loop: Dict[tuple, Runnable] = {}
+        self._lock = threading.Lock()
+
+    def _models(self) -> Dict[tuple, Runnable]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._no_loop
+        models = self._by_loop.get(loop)
+        if models is None:
+            models = self._by_loop[loop] = {}
+        return models
+
+    def get(self, model: str, model_provider: Optional[str] = None, schema: Optional[type] = None,
+            tools: Optional[Sequence[Any]] = None, bind_kwargs: Optional[Dict[str, Any]] = None, **kwargs) -> Runnable:
+        """Return the shared model for these arguments, creating it on first use.
+
+        Args:
+            model: Model name, as passed to ``init_chat_model``
+            model_provider: Model provider, as passed to ``init_chat_model``
+            schema: Return the model wrapped with ``with_structured_output(schema)``
+            tools: Return the model with these tools bound
+            bind_kwargs: Extra arguments for ``bind_tools``
+            **kwargs: Further arguments for ``init_chat_model``
+
+        Returns:
+            A chat model, or a runnable around it for ``schema`` and ``tools``
+        """
+        base_key = (model_provider, model, _freeze(kwargs))
+        key = base_key + (schema, tuple(getattr(tool, "name", repr(tool)) for tool in tools or ()), _freeze(bind_kwargs))
+        with self._lock:
+            models = self._models()
+            runnable = models.get(key)
+            if runnable is not None:
+                MODEL_LOOKUPS.inc(result="hit")
+                return runnable
+            MODEL_LOOKUPS.inc(result="miss")
+            # Structured and tool-calling variants share the client of the plain model
+            base = models.get(base_key)
+            if base is None:
+                base = models[base_key] = init_chat_model(model=model, model_provider=model_provider, **kwargs)
+                MODELS_CREATED.inc(provider=model_provider or "default", model=model)
+            runnable = base
+            if tools is not None:
+                runnable = runnable.bind_tools(tools, **(bind_kwargs or {}))
+            if schema is not None:
+                runnable = runnable.with_structured_output(schema)
+            models[key] = runnable
+            return runnable
+
+    def clear(self):
+        """Drop every cached model, e.g. after changing provider settings."""
+        with self._lock:
+            self._by_loop = WeakKeyDictionary()
+            self._no_loop = {}
+
+MODELS = ModelRegistry()
+
+def get_chat_model(model: str, model_provider: Optional[str] = None, schema: Optional[type] = None,
+                   tools: Optional[Sequence[Any]] = None, bind_kwargs: Optional[Dict[str, Any]] = None, **kwargs) -> Runnable:
+    """Return the process-wide chat model for these arguments; see ``ModelRegistry.get``."""
+    return MODELS.get(model, model_provider, schema=schema, tools=tools, bind_kwargs=bind_kwargs, **kwargs)
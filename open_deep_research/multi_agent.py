@@ -1,7 +1,6 @@
 from typing import List, Annotated, TypedDict, operator, Literal
 from pydantic import BaseModel, Field
 
-from langchain.chat_models import init_chat_model
 from langchain_core.tools import tool
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import MessagesState
@@ -10,6 +9,8 @@ from langgraph.types import Command, Send
 from langgraph.graph import START, END, StateGraph
 
 from open_deep_research.configuration import Configuration
+from open_deep_research.metrics import timed_node
+from open_deep_research.models import get_chat_model
 from open_deep_research.utils import get_config_value, tavily_search, duckduckgo_search
 from open_deep_research.prompts import SUPERVISOR_INSTRUCTIONS, RESEARCH_INSTRUCTIONS
 
@@ -110,21 +111,21 @@ async def supervisor(state: ReportState, config: RunnableConfig):
     configurable = Configuration.from_runnable_config(config)
     supervisor_model = get_config_value(configurable.supervisor_model)
     
-    # Initialize the model
-    llm = init_chat_model(model=supervisor_model)
+    # Get tools based on configuration
+    supervisor_tool_list, _ = get_supervisor_tools(config)
+
+    # Shared model with the tools bound
+    llm = get_chat_model(model=supervisor_model, tools=supervisor_tool_list, bind_kwargs={"parallel_tool_calls": False})
     
     # If sections have been completed, but we don't yet have the final report, then we need to initiate writing the introduction and conclusion
     if state.get("completed_sections") and not state.get("final_report"):
         research_complete_message = {"role": "user", "content": "Research is complete. Now write the introduction and conclusion for the report. Here are the completed main body sections: \n\n" + "\n\n".join([s.content for s in state["completed_sections"]])}
         messages = messages + [research_complete_message]
 
-    # Get tools based on configuration
-    supervisor_tool_list, _ = get_supervisor_tools(config)
-    
     # Invoke
     return {
         "messages": [
-            await llm.bind_tools(supervisor_tool_list, parallel_tool_calls=False).ainvoke(
+            await llm.ainvoke(
                 [
                     {"role": "system",
                      "content": SUPERVISOR_INSTRUCTIONS,
@@ -223,16 +224,16 @@ async def research_agent(state: SectionState, config: RunnableConfig):
     configurable = Configuration.from_runnable_config(config)
     researcher_model = get_config_value(configurable.researcher_model)
     
-    # Initialize the model
-    llm = init_chat_model(model=researcher_model)
-
     # Get tools based on configuration
     research_tool_list, _ = get_research_tools(config)
+
+    # Shared model with the tools bound
+    llm = get_chat_model(model=researcher_model, tools=research_tool_list)
     
     return {
         "messages": [
             # Enforce tool calling to either perform more search or call the Section tool to write the section
-            await llm.bind_tools(research_tool_list).ainvoke(
+            await llm.ainvoke(
                 [
                     {"role": "system",
                      "content": RESEARCH_INSTRUCTIONS.format(section_description=state["section"])
@@ -296,8 +297,8 @@ async def research_agent_should_continue(state: SectionState) -> Literal["resear
 
 # Research agent workflow
 research_builder = StateGraph(SectionState, output=SectionOutputState, config_schema=Configuration)
-research_builder.add_node("research_agent", research_agent)
-research_builder.add_node("research_agent_tools", research_agent_tools)
+research_builder.add_node("research_agent", timed_node("research_agent")(research_agent))
+research_builder.add_node("research_agent_tools", timed_node("research_agent_tools")(research_agent_tools))
 research_builder.add_edge(START, "research_agent") 
 research_builder.add_conditional_edges(
     "research_agent",
@@ -312,8 +313,8 @@ research_builder.add_edge("research_agent_tools", "research_agent")
 
 # Supervisor workflow
 supervisor_builder = StateGraph(ReportState, input=MessagesState, output=ReportStateOutput, config_schema=Configuration)
-supervisor_builder.add_node("supervisor", supervisor)
-supervisor_builder.add_node("supervisor_tools", supervisor_tools)
+supervisor_builder.add_node("supervisor", timed_node("supervisor")(supervisor))
+supervisor_builder.add_node("supervisor_tools", timed_node("supervisor_tools")(supervisor_tools))
 supervisor_builder.add_node("research_team", research_builder.compile())
 
 # Flow of the supervisor agent
@@ -1,12 +1,8 @@
-report_planner_query_writer_instructions="""You are performing research for a report. 
-
-<Report topic>
-{topic}
-</Report topic>
+# Prompts start with their static instructions, followed by the report-level
+# context (organization, topic) and end with what changes per section, so
+# all calls of a run share a byte-identical prefix the providers can cache.
 
-<Report organization>
-{report_organization}
-</Report organization>
+report_planner_query_writer_instructions="""You are performing research for a report. 
 
 <Task>
 Your goal is to generate {number_of_queries} web search queries that will help gather information for planning the report sections. 
@@ -22,24 +18,17 @@ Make the queries specific enough to find high-quality, relevant sources while co
 <Format>
 Call the Queries tool 
 </Format>
-"""
 
-report_planner_instructions="""I want a plan for a report that is concise and focused.
+<Report organization>
+{report_organization}
+</Report organization>
 
 <Report topic>
-The topic of the report is:
 {topic}
 </Report topic>
+"""
 
-<Report organization>
-The report should follow this organization: 
-{report_organization}
-</Report organization>
-
-<Context>
-Here is context to use to plan the sections of the report: 
-{context}
-</Context>
+report_planner_instructions="""I want a plan for a report that is concise and focused.
 
 <Task>
 Generate a list of sections for the report. Your plan should be tight and focused with NO overlapping sections or unnecessary filler. 
@@ -68,40 +57,84 @@ Integration guidelines:
 Before submitting, review your structure to ensure it has no redundant sections and follows a logical flow.
 </Task>
 
+<Format>
+Call the Sections tool 
+</Format>
+
+<Report organization>
+The report should follow this organization: 
+{report_organization}
+</Report organization>
+
+<Report topic>
+The topic of the report is:
+{topic}
+</Report topic>
+
+<Context>
+Here is context to use to plan the sections of the report: 
+{context}
+</Context>
+
 <Feedback>
 Here is feedback on the report structure from review (if any):
 {feedback}
 </Feedback>
-
-<Format>
-Call the Sections tool 
-</Format>
 """
 
 query_writer_instructions="""You are an expert technical writer crafting targeted web search queries that will gather comprehensive information for writing a technical report section.
 
+<Task>
+Your goal is to generate the requested number of search queries that will help gather comprehensive information about the section topic given in the request. 
+
+The queries should:
+
+1. Be related to the topic 
+2. Examine different aspects of the topic
+
+Make the queries specific enough to find high-quality, relevant sources.
+</Task>
+
+<Format>
+Call the Queries tool 
+</Format>
+
 <Report topic>
 {topic}
 </Report topic>
+"""
 
-<Section topic>
+query_writer_inputs="""<Section topic>
 {section_topic}
 </Section topic>
 
+Generate {number_of_queries} search queries on the provided topic."""
+
+batched_query_writer_instructions="""You are an expert technical writer crafting targeted web search queries that will gather comprehensive information for writing the sections of a technical report.
+
 <Task>
-Your goal is to generate {number_of_queries} search queries that will help gather comprehensive information above the section topic. 
+For every section listed below, generate {number_of_queries} search queries that will help gather comprehensive information about that section's topic. 
 
 The queries should:
 
-1. Be related to the topic 
-2. Examine different aspects of the topic
+1. Be related to the topic of their section
+2. Examine different aspects of the section topic
+3. Not repeat the queries of other sections
 
 Make the queries specific enough to find high-quality, relevant sources.
 </Task>
 
 <Format>
-Call the Queries tool 
+Call the BatchedQueries tool with one entry per section, using the exact section name
 </Format>
+
+<Report topic>
+{topic}
+</Report topic>
+
+<Sections>
+{sections}
+</Sections>
 """
 
 section_writer_instructions = """Write one section of a research report.
@@ -161,24 +194,56 @@ section_writer_inputs="""
 </Source material>
 """
 
-section_grader_instructions = """Review a report section relative to the specified topic:
+section_reviser_instructions = """Revise one section of a research report with new source material.
 
+<Task>
+1. Review the current section and the information a reviewer found missing.
+2. Look at the new source material.
+3. Add the missing information that the new sources support, with as few and as small edits as possible.
+</Task>
+
+<Editing Rules>
+- Do not rewrite the section: leave every passage that does not need to change as it is
+- For each edit, copy the exact passage of the current section to replace into find, and give its replacement in replace
+- To add a paragraph at the end of the section body, leave find empty
+- Keep the 150-200 word limit and the Markdown format of the section
+- Cite new sources with numbers continuing after the existing ones, and return their lines for the ### Sources list in new_sources, e.g. [4] Source Title: URL
+- Return no edits if the new sources do not add anything
+</Editing Rules>
+"""
+
+section_reviser_inputs = """
 <Report topic>
 {topic}
 </Report topic>
 
-<section topic>
+<Section name>
+{section_name}
+</Section name>
+
+<Section topic>
 {section_topic}
-</section topic>
+</Section topic>
 
-<section content>
-{section}
-</section content>
+<Current section>
+{section_content}
+</Current section>
+
+<Missing information>
+{gaps}
+</Missing information>
+
+<New source material>
+{context}
+</New source material>
+"""
+
+section_grader_instructions = """Review a report section relative to the specified topic.
 
 <task>
-Evaluate whether the section content adequately addresses the section topic.
+Evaluate whether the section content given in the request adequately addresses its section topic.
 
-If the section content does not adequately address the section topic, generate {number_of_follow_up_queries} follow-up search queries to gather missing information.
+If the section content does not adequately address the section topic, generate the requested number of follow-up search queries to gather missing information.
 </task>
 
 <format>
@@ -191,25 +256,23 @@ follow_up_queries: List[SearchQuery] = Field(
     description="List of follow-up search queries.",
 )
 </format>
-"""
-
-final_section_writer_instructions="""You are an expert technical writer crafting a section that synthesizes information from the rest of the report.
 
 <Report topic>
 {topic}
 </Report topic>
+"""
 
-<Section name>
-{section_name}
-</Section name>
-
-<Section topic> 
+section_grader_inputs = """<section topic>
 {section_topic}
-</Section topic>
+</section topic>
 
-<Available report content>
-{context}
-</Available report content>
+<section content>
+{section}
+</section content>
+
+Grade the report and consider follow-up questions for missing information. If the grade is 'pass', return empty strings for all follow-up queries. If the grade is 'fail', provide {number_of_follow_up_queries} specific search queries to gather missing information."""
+
+final_section_writer_instructions="""You are an expert technical writer crafting a section that synthesizes information from the rest of the report.
 
 <Task>
 1. Section-Specific Approach:
@@ -251,7 +314,26 @@ For Conclusion/Summary:
 - For conclusion: 100-150 word limit, ## for section title, only ONE structural element at most, no sources section
 - Markdown format
 - Do not include word count or any preamble in your response
-</Quality Checks>"""
+</Quality Checks>
+
+<Report topic>
+{topic}
+</Report topic>
+
+<Available report content>
+{context}
+</Available report content>
+"""
+
+final_section_writer_inputs="""<Section name>
+{section_name}
+</Section name>
+
+<Section topic> 
+{section_topic}
+</Section topic>
+
+Generate a report section based on the provided sources."""
 
 
 ## Supervisor
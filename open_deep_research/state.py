@@ -29,6 +29,35 @@ class Queries(BaseModel):
         description="List of search queries.",
     )
 
+class SectionQueries(BaseModel):
+    section_name: str = Field(
+        description="Name of the report section the queries are for.",
+    )
+    queries: List[SearchQuery] = Field(
+        description="List of search queries for this section.",
+    )
+
+class BatchedQueries(BaseModel):
+    sections: List[SectionQueries] = Field(
+        description="Search queries for every section of the report that needs research.",
+    )
+
+class SectionEdit(BaseModel):
+    find: str = Field(
+        description="Exact passage of the current section to replace. Leave empty to add text at the end of the section body.",
+    )
+    replace: str = Field(
+        description="Replacement for the passage, or the text to add.",
+    )
+
+class SectionPatch(BaseModel):
+    edits: List[SectionEdit] = Field(
+        description="Targeted edits that add the missing information to the section.",
+    )
+    new_sources: List[str] = Field(
+        description="Lines to add to the ### Sources list for newly cited sources, e.g. '[4] Source Title: URL'.",
+    )
+
 class Feedback(BaseModel):
     grade: Literal["pass","fail"] = Field(
         description="Evaluation result indicating whether the response meets requirements ('pass') or needs revision ('fail')."
@@ -47,6 +76,8 @@ class ReportState(TypedDict):
     topic: str # Report topic    
     feedback_on_report_plan: Annotated[list[str], operator.add] # List of feedback on the report plan
     sections: list[Section] # List of report sections 
+    section_queries: dict[str, list[SearchQuery]] # Search queries per section name, when generated in one batch
+    planning_sources: list[dict] # Sources found while planning, kept to seed section research
     completed_sections: Annotated[list, operator.add] # Send() API key
     report_sections_from_research: str # String of any completed sections from research to write final sections
     final_report: str # Final report
@@ -56,6 +87,9 @@ class SectionState(TypedDict):
     section: Section # Report section  
     search_iterations: int # Number of search iterations done
     search_queries: list[SearchQuery] # List of search queries
+    seed_sources: list[dict] # Planning sources relevant to this section, used in its first search round
+    sources: list[dict] # Sources found in all search rounds of the section, newest first
+    new_source_count: int # Number of sources at the start of sources found by the last search round
     source_str: str # String of formatted source content from web search
     report_sections_from_research: str # String of any completed sections from research to write final sections
     completed_sections: list[Section] # Final key we duplicate in outer state for Send() API
@@ -1,32 +1,25 @@
 import os
+import json
 import asyncio
 import requests
 import random 
 import concurrent
-import aiohttp
 import httpx
 import time
-from typing import List, Optional, Dict, Any, Union, Literal
+from typing import Awaitable, Callable, List, Optional, Dict, Any, Union, Literal
 from urllib.parse import unquote
 
-from exa_py import Exa
-from linkup import LinkupClient
-from tavily import AsyncTavilyClient
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents.aio import SearchClient as AsyncAzureAISearchClient
-import asyncio
-import os
-from duckduckgo_search import DDGS 
-from bs4 import BeautifulSoup
-from markdownify import markdownify
-
-from langchain_community.retrievers import ArxivRetriever
-from langchain_community.utilities.pubmed import PubMedAPIWrapper
+# Search backend SDKs (exa_py, linkup, tavily, azure-search-documents,
+# duckduckgo_search, bs4, markdownify, aiohttp and the langchain_community
+# arXiv/PubMed wrappers) are imported inside the functions that use them,
+# so only the backend a deployment actually calls is ever loaded.
 from langchain_core.tools import tool
 
 from langsmith import traceable
 
-from open_deep_research.state import Section
+from open_deep_research.context import coverage, format_source, pack_context, terms, truncate_to_tokens
+from open_deep_research.metrics import SEARCH_CALLS, SEARCH_ERRORS, SEARCH_QUERIES, SEARCH_SECONDS
+from open_deep_research.state import Section, SectionPatch
     
 def get_config_value(value):
     """
@@ -79,7 +72,7 @@ def deduplicate_and_format_sources(
 ):
     """
     Takes a list of search responses and formats them into a readable string.
-    Limits the raw_content to approximately max_tokens_per_source tokens.
+    Limits the raw_content to max_tokens_per_source tokens.
  
     Args:
         search_responses: List of search response dicts, each containing:
@@ -114,27 +107,60 @@ def deduplicate_and_format_sources(
 
     # Format output
     formatted_text = "Content from sources:\n"
-    for i, source in enumerate(unique_sources.values(), 1):
-        formatted_text += f"{'='*80}\n"  # Clear section separator
-        formatted_text += f"Source: {source['title']}\n"
-        formatted_text += f"{'-'*80}\n"  # Subsection separator
-        formatted_text += f"URL: {source['url']}\n===\n"
-        formatted_text += f"Most relevant content from source: {source['content']}\n===\n"
+    for source in unique_sources.values():
+        raw_content = None
         if include_raw_content:
-            # Using rough estimate of 4 characters per token
-            char_limit = max_tokens_per_source * 4
             # Handle None raw_content
             raw_content = source.get('raw_content', '')
             if raw_content is None:
                 raw_content = ''
                 print(f"Warning: No raw_content found for source {source['url']}")
-            if len(raw_content) > char_limit:
-                raw_content = raw_content[:char_limit] + "... [truncated]"
-            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
-        formatted_text += f"{'='*80}\n\n" # End section separator
+            truncated = truncate_to_tokens(raw_content, max_tokens_per_source)
+            if len(truncated) < len(raw_content):
+                raw_content = truncated + "... [truncated]"
+        formatted_text += format_source(source, raw_content, max_tokens_per_source)
                 
     return formatted_text.strip()
 
+def merge_sources(earlier: List[dict], search_results: Union[str, List[dict]]) -> List[dict]:
+    """Add the sources of new search results to the sources a section already has.
+    
+    Sources are deduplicated by URL. Sources not seen before come first, in
+    the order they were found, followed by the earlier sources, so the
+    newest information is packed first when the context budget runs out.
+    """
+    known = {source["url"] for source in earlier}
+    return [source for source in collect_sources(search_results) if source["url"] not in known] + list(earlier)
+
+def apply_section_patch(content: str, patch: SectionPatch) -> Optional[str]:
+    """Apply the edits of a revision patch to a section draft.
+    
+    Edits with an empty ``find`` add their text to the end of the section
+    body, before its ``### Sources`` list, and new source lines are added to
+    the end of that list.
+    
+    Returns:
+        The revised section, or None if the passage of an edit is not in the
+        draft, so the caller can rewrite the section instead
+    """
+    heading = content.find("### Sources")
+    if heading == -1:
+        body, sources = content.rstrip(), ""
+    else:
+        body, sources = content[:heading].rstrip(), content[heading:].rstrip()
+    for edit in patch.edits:
+        if not edit.find.strip():
+            body += "\n\n" + edit.replace.strip()
+        elif edit.find in body:
+            body = body.replace(edit.find, edit.replace, 1)
+        elif edit.find in sources:
+            sources = sources.replace(edit.find, edit.replace, 1)
+        else:
+            return None
+    if patch.new_sources:
+        sources = "\n".join([sources or "### Sources"] + [line.strip() for line in patch.new_sources])
+    return f"{body}\n\n{sources}" if sources else body
+
 def format_sections(sections: list[Section]) -> str:
     """ Format a list of sections into a string """
     formatted_str = ""
@@ -184,6 +210,8 @@ async def tavily_search_async(search_queries, max_results: int = 5, topic: Liter
                     ]
                 }
     """
+    from tavily import AsyncTavilyClient
+
     tavily_async_client = AsyncTavilyClient()
     search_tasks = []
     for query in search_queries:
@@ -214,6 +242,9 @@ async def azureaisearch_search_async(search_queries: list[str], max_results: int
     Returns:
         List[dict]: list of search responses from Azure AI Search API, one per query.
     """
+    from azure.core.credentials import AzureKeyCredential
+    from azure.search.documents.aio import SearchClient as AsyncAzureAISearchClient
+
     # configure and create the Azure Search client
     # ensure all environment variables are set
     if not all(var in os.environ for var in ["AZURE_AI_SEARCH_ENDPOINT", "AZURE_AI_SEARCH_INDEX_NAME", "AZURE_AI_SEARCH_API_KEY"]):
@@ -396,6 +427,8 @@ async def exa_search(search_queries, max_characters: Optional[int] = None, num_r
     if include_domains and exclude_domains:
         raise ValueError("Cannot specify both include_domains and exclude_domains")
     
+    from exa_py import Exa
+
     # Initialize Exa client (API key should be configured in your .env file)
     exa = Exa(api_key = f"{os.getenv('EXA_API_KEY')}")
     
@@ -588,6 +621,7 @@ async def arxiv_search_async(search_queries, load_max_docs=5, get_full_documents
                 ]
             }
     """
+    from langchain_community.retrievers import ArxivRetriever
     
     async def process_single_query(query):
         try:
@@ -746,6 +780,7 @@ async def pubmed_search_async(search_queries, top_k_results=5, email=None, api_k
                 ]
             }
     """
+    from langchain_community.utilities.pubmed import PubMedAPIWrapper
     
     async def process_single_query(query):
         try:
@@ -885,6 +920,8 @@ async def linkup_search(search_queries, depth: Optional[str] = "standard"):
                 ]
             }
     """
+    from linkup import LinkupClient
+
     client = LinkupClient()
     search_tasks = []
     for query in search_queries:
@@ -923,7 +960,8 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
     Returns:
         List[dict]: List of search responses from Google, one per query
     """
-
+    import aiohttp
+    from bs4 import BeautifulSoup
 
     # Check for API credentials from environment variables
     api_key = os.environ.get("GOOGLE_API_KEY")
@@ -1188,6 +1226,7 @@ async def scrape_pages(titles: List[str], urls: List[str]) -> str:
         str: A formatted string containing the full content of each page in markdown format,
              with clear section dividers and source attribution
     """
+    from markdownify import markdownify
     
     # Create an async HTTP client
     async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
@@ -1239,6 +1278,7 @@ async def duckduckgo_search(search_queries: List[str]):
     Returns:
         str: A formatted string of search results
     """
+    from duckduckgo_search import DDGS
     
     async def process_single_query(query):
         # Execute synchronous search in the event loop's thread pool
@@ -1340,6 +1380,9 @@ async def duckduckgo_search(search_queries: List[str]):
     else:
         return "No valid search results found. Please try different search queries or use a different search API."
 
+# Page content per source in the formatted output of the search tools
+MAX_TOOL_SOURCE_TOKENS = 8_000
+
 @tool
 async def tavily_search(queries: List[str], max_results: int = 5, topic: Literal["general", "news", "finance"] = "general") -> str:
     """
@@ -1378,7 +1421,7 @@ async def tavily_search(queries: List[str], max_results: int = 5, topic: Literal
         formatted_output += f"URL: {url}\n\n"
         formatted_output += f"SUMMARY:\n{result['content']}\n\n"
         if result.get('raw_content'):
-            formatted_output += f"FULL CONTENT:\n{result['raw_content'][:30000]}"  # Limit content size
+            formatted_output += f"FULL CONTENT:\n{truncate_to_tokens(result['raw_content'], MAX_TOOL_SOURCE_TOKENS)}"  # Limit content size
         formatted_output += "\n\n" + "-" * 80 + "\n"
     
     if unique_results:
@@ -1423,7 +1466,7 @@ async def azureaisearch_search(queries: List[str], max_results: int = 5, topic:
         formatted_output += f"URL: {url}\n\n"
         formatted_output += f"SUMMARY:\n{result['content']}\n\n"
         if result.get('raw_content'):
-            formatted_output += f"FULL CONTENT:\n{result['raw_content'][:30000]}"  # Limit content size
+            formatted_output += f"FULL CONTENT:\n{truncate_to_tokens(result['raw_content'], MAX_TOOL_SOURCE_TOKENS)}"  # Limit content size
         formatted_output += "\n\n" + "-" * 80 + "\n"
     
     if unique_results:
@@ -1432,43 +1475,240 @@ async def azureaisearch_search(queries: List[str], max_results: int = 5, topic:
         return "No valid search results found. Please try different search queries or use a different search API."
 
 
-async def select_and_execute_search(search_api: str, query_list: list[str], params_to_pass: dict) -> str:
-    """Select and execute the appropriate search API.
+# Registry of search backends by search_api name. Each backend is awaited
+# with the query list and the filtered search parameters, and returns either
+# raw search responses (formatted by format_search_results) or an
+# already formatted source string.
+SearchBackend = Callable[..., Awaitable[Union[str, List[dict]]]]
+SEARCH_BACKENDS: Dict[str, SearchBackend] = {}
+
+def register_search_backend(name: str, backend: SearchBackend):
+    """Register ``backend`` as the implementation of the ``name`` search API."""
+    SEARCH_BACKENDS[name] = backend
+
+async def _tavily_backend(query_list, **params):
+    # Same search as the Tavily tool of the agent, but the raw responses, so the
+    # workflow can merge and pack the sources
+    return await tavily_search_async(query_list, **{"max_results": 5, "topic": "general", "include_raw_content": True, **params})
+
+async def _duckduckgo_backend(query_list, **params):
+    # DuckDuckGo search tool used with both workflow and agent 
+    return await duckduckgo_search.ainvoke({'search_queries': query_list})
+
+async def _perplexity_backend(query_list, **params):
+    # The Perplexity client is synchronous, keep it off the event loop
+    return await asyncio.to_thread(perplexity_search, query_list, **params)
+
+register_search_backend("tavily", _tavily_backend)
+register_search_backend("duckduckgo", _duckduckgo_backend)
+register_search_backend("perplexity", _perplexity_backend)
+register_search_backend("exa", exa_search)
+register_search_backend("arxiv", arxiv_search_async)
+register_search_backend("pubmed", pubmed_search_async)
+register_search_backend("linkup", linkup_search)
+register_search_backend("googlesearch", google_search_async)
+register_search_backend("azureaisearch", azureaisearch_search_async)
+
+class _SearchAbandoned(Exception):
+    """The run executing a coalesced query was cancelled; a waiting run executes it instead."""
+
+class SearchCoalescer:
+    """Share search results between research runs that search for the same queries.
+
+    Every query is keyed by search API, normalized query text and search
+    parameters. The first run to ask for a query executes it; concurrent and
+    later runs asking for the same query await that result instead of
+    calling the backend again. Queries a run still needs are sent to the
+    backend as one batch, and at most ``max_concurrency`` backend calls run
+    at a time across all runs sharing the coalescer. Failed searches are not
+    kept, so a later run retries them. If the run executing a query is
+    cancelled, a run waiting for it executes the query itself.
+
+    Pass one coalescer per batch of related reports in the ``search_coalescer``
+    entry of the graph's ``configurable`` config.
+
+    Args:
+        max_concurrency: Maximum number of concurrent backend calls
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        self._results: Dict[tuple, asyncio.Future] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.requested = 0
+        self.executed = 0
+
+    async def _claim(self, items: List[tuple], execute) -> List[asyncio.Future]:
+        """Return a future per ``(key, query)``, executing the queries no run has claimed yet."""
+        loop = asyncio.get_running_loop()
+        futures, pending = [], []
+        for key, query in items:
+            future = self._results.get(key)
+            if future is None:
+                future = self._results[key] = loop.create_future()
+                pending.append((key, query, future))
+            futures.append(future)
+
+        if pending:
+            self.executed += len(pending)
+            try:
+                async with self._semaphore:
+                    results = await execute([query for _, query, _ in pending])
+            except BaseException as e:
+                for key, _, future in pending:
+                    del self._results[key]
+                    # Waiters must not be cancelled with this run; they search themselves instead
+                    future.set_exception(_SearchAbandoned() if isinstance(e, asyncio.CancelledError) else e)
+                    # Waiters re-raise the error; mark it retrieved for this caller
+                    future.exception()
+                raise
+            if isinstance(results, list) and len(results) == len(pending):
+                for (_, _, future), result in zip(pending, results):
+                    future.set_result(result)
+            else:
+                # Formatted or unaligned results cannot be split per query; share them whole
+                for _, _, future in pending:
+                    future.set_result(results)
+        return futures
+
+    async def search(self, search_api: str, query_list: List[str], params: dict,
+                     execute: Callable[[List[str]], Awaitable[Union[str, List[dict]]]]) -> Union[str, List[dict]]:
+        """Return the results for ``query_list``, calling ``execute`` only for unseen queries.
+
+        Returns:
+            A list of per-query responses, or the joined formatted strings for
+            backends that return formatted sources
+        """
+        params_key = json.dumps(params, sort_keys=True, default=str)
+        keys = [(search_api, " ".join(query.lower().split()), params_key) for query in query_list]
+        self.requested += len(query_list)
+        futures = await self._claim(list(zip(keys, query_list)), execute)
+
+        resolved = []
+        for key, query, future in zip(keys, query_list, futures):
+            while True:
+                try:
+                    resolved.append(await asyncio.shield(future))
+                    break
+                except _SearchAbandoned:
+                    # The run executing this query was cancelled: run it here, or join whoever does now
+                    future = (await self._claim([(key, query)], execute))[0]
+        if any(not isinstance(result, dict) for result in resolved):
+            parts = []
+            for result in resolved:
+                text = result if isinstance(result, str) else deduplicate_and_format_sources(
+                    result if isinstance(result, list) else [result], max_tokens_per_source=4000, deduplication_strategy="keep_first")
+                if text not in parts:
+                    parts.append(text)
+            return "\n\n".join(parts)
+        return resolved
+
+def get_search_coalescer(config) -> Optional[SearchCoalescer]:
+    """Return the SearchCoalescer passed in a run's configurable config, if any."""
+    return ((config or {}).get("configurable") or {}).get("search_coalescer")
+
+async def execute_search(search_api: str, query_list: list[str], params_to_pass: dict,
+                         search_coalescer: Optional[SearchCoalescer] = None) -> Union[str, List[dict]]:
+    """Execute the search queries with the selected search API, without formatting.
     
     Args:
         search_api: Name of the search API to use
         query_list: List of search queries to execute
         params_to_pass: Parameters to pass to the search API
+        search_coalescer: Optional coalescer sharing results with other runs
         
     Returns:
-        Formatted string containing search results
+        A list of search responses, or an already formatted source string for
+        backends that only return formatted sources
         
     Raises:
         ValueError: If an unsupported search API is specified
     """
     print(f"query_list: {query_list} params_to_pass: {params_to_pass}")
-    if search_api == "tavily":
-        # Tavily search tool used with both workflow and agent 
-        # and returns a formatted source string
-        return await tavily_search.ainvoke({'queries': query_list}, **params_to_pass)
-    elif search_api == "duckduckgo":
-        # DuckDuckGo search tool used with both workflow and agent 
-        return await duckduckgo_search.ainvoke({'search_queries': query_list})
-    elif search_api == "perplexity":
-        search_results = perplexity_search(query_list, **params_to_pass)
-    elif search_api == "exa":
-        search_results = await exa_search(query_list, **params_to_pass)
-    elif search_api == "arxiv":
-        search_results = await arxiv_search_async(query_list, **params_to_pass)
-    elif search_api == "pubmed":
-        search_results = await pubmed_search_async(query_list, **params_to_pass)
-    elif search_api == "linkup":
-        search_results = await linkup_search(query_list, **params_to_pass)
-    elif search_api == "googlesearch":
-        search_results = await google_search_async(query_list, **params_to_pass)
-    elif search_api == "azureaisearch":
-        search_results = await azureaisearch_search_async(query_list, **params_to_pass)
-    else:
+    backend = SEARCH_BACKENDS.get(search_api)
+    if backend is None:
         raise ValueError(f"Unsupported search API: {search_api}")
 
-    return deduplicate_and_format_sources(search_results, max_tokens_per_source=4000, deduplication_strategy="keep_first")
\ No newline at end of file
+    async def execute(queries):
+        SEARCH_CALLS.inc(backend=search_api)
+        SEARCH_QUERIES.inc(len(queries), backend=search_api)
+        started = time.perf_counter()
+        try:
+            return await backend(queries, **params_to_pass)
+        except Exception:
+            SEARCH_ERRORS.inc(backend=search_api)
+            raise
+        finally:
+            SEARCH_SECONDS.observe(time.perf_counter() - started, backend=search_api)
+
+    if search_coalescer is not None:
+        return await search_coalescer.search(search_api, query_list, params_to_pass, execute)
+    return await execute(query_list)
+
+def format_search_results(search_results: Union[str, List[dict]], max_tokens: Optional[int] = None, query: str = "") -> str:
+    """Format the result of ``execute_search`` as the source string given to the models.
+    
+    With ``max_tokens`` the sources are packed into that budget by
+    ``pack_context``, most relevant to ``query`` first; formatted source
+    strings are cut to it.
+    """
+    if isinstance(search_results, str):
+        return search_results if max_tokens is None else truncate_to_tokens(search_results, max_tokens)
+    if max_tokens is not None:
+        return pack_context(collect_sources(search_results), max_tokens, query)
+
+    return deduplicate_and_format_sources(search_results, max_tokens_per_source=4000, deduplication_strategy="keep_first")
+
+async def select_and_execute_search(search_api: str, query_list: list[str], params_to_pass: dict,
+                                    search_coalescer: Optional[SearchCoalescer] = None) -> str:
+    """Select and execute the appropriate search API.
+    
+    Args:
+        search_api: Name of the search API to use
+        query_list: List of search queries to execute
+        params_to_pass: Parameters to pass to the search API
+        search_coalescer: Optional coalescer sharing results with other runs
+        
+    Returns:
+        Formatted string containing search results
+        
+    Raises:
+        ValueError: If an unsupported search API is specified
+    """
+    return format_search_results(await execute_search(search_api, query_list, params_to_pass, search_coalescer))
+
+def collect_sources(search_results: Union[str, List[dict]]) -> List[dict]:
+    """Return the unique sources (by URL, first seen kept) of raw search responses.
+    
+    Formatted source strings carry no structured sources and yield an empty list.
+    """
+    if isinstance(search_results, str):
+        return []
+    sources = {}
+    for response in search_results:
+        for source in response.get("results", []):
+            sources.setdefault(source["url"], source)
+    return list(sources.values())
+
+def select_relevant_sources(sources: List[dict], text: str, limit: int, min_coverage: float = 0.5) -> List[dict]:
+    """Return up to ``limit`` sources whose title and snippet cover most terms of ``text``.
+    
+    A source's coverage is the share of the distinct terms of ``text`` that
+    appear in its title or snippet; sources below ``min_coverage`` are left
+    out and the rest are returned best first.
+    
+    Args:
+        sources: Source dicts with title, url and content
+        text: Text describing what the sources should cover, e.g. a section description
+        limit: Maximum number of sources to return
+        min_coverage: Minimum share of the terms of ``text`` a source must contain
+    """
+    wanted = terms(text)
+    if not wanted or limit <= 0:
+        return []
+    scored = []
+    for source in sources:
+        source_coverage = coverage(wanted, f"{source.get('title', '')} {source.get('content', '')}")
+        if source_coverage >= min_coverage:
+            scored.append((source_coverage, source))
+    scored.sort(key=lambda item: -item[0])
+    return [source for _, source in scored[:limit]]
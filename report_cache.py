@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from report_store import atomic_write
+from open_deep_research.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = REGISTRY.counter("odr_report_cache_hits_total", "Reports served from the cache or a shared in-flight generation.")
+CACHE_MISSES = REGISTRY.counter("odr_report_cache_misses_total", "Reports that had to be generated.")
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_ARTICLES = {"a", "an", "the"}
+
+def normalize_topic(topic: str) -> str:
+    """Normalize a research topic so trivially different phrasings share a cache entry.
+
+    Case, punctuation, articles and repeated whitespace are ignored, so
+    "What is Model Context Protocol?" and "what is the model context protocol"
+    normalize to the same string.
+    """
+    words = _PUNCTUATION.sub(" ", topic.lower()).split()
+    return " ".join(w for w in words if w not in _ARTICLES)
+
+def cache_key(topic: str, config: Dict[str, Any]) -> str:
+    """Build the cache key for a topic researched with the given effective configuration."""
+    payload = json.dumps({"topic": normalize_topic(topic), "config": config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class _GenerationAbandoned(Exception):
+    """The request generating a report was cancelled; a waiting request takes over."""
+
+class ReportCache:
+    """Disk-backed report cache with TTL, LRU eviction and single-flight.
+
+    Each entry is a JSON file named after its key. The file's modification
+    time tracks the last access, which drives LRU eviction once more than
+    ``max_entries`` reports are cached. Concurrent requests for the same key
+    share one in-flight generation instead of each running the pipeline;
+    if the request generating it is cancelled, a waiting request takes over.
+
+    Args:
+        root: Directory holding the cache entries
+        ttl_seconds: Entries older than this are treated as missing
+        max_entries: Maximum number of cached reports
+    """
+
+    def __init__(self, root: str, ttl_seconds: float = 24 * 3600, max_entries: int = 256):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["ReportCache"]:
+        """Build a cache from the REPORT_CACHE_* environment variables, or None if disabled."""
+        if os.getenv("REPORT_CACHE", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            root=os.getenv("REPORT_CACHE_DIR", os.path.join(os.getcwd(), "temp", "cache")),
+            ttl_seconds=float(os.getenv("REPORT_CACHE_TTL_HOURS", "24")) * 3600,
+            max_entries=int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "256")),
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + ".json")
+
+    def _get_sync(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Concurrent requests and evictions may remove the file at any point; that is a miss at worst
+        if time.time() - entry["created_at"] > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        # Record the access for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["report"]
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            # Removed meanwhile; evicting it again is a no-op
+            return 0.0
+
+    def _put_sync(self, key: str, topic: str, report: str):
+        entry = {"topic": topic, "created_at": time.time(), "report": report}
+        atomic_write(self._path(key), json.dumps(entry).encode("utf-8"))
+
+        entries = [os.path.join(self.root, name) for name in os.listdir(self.root) if name.endswith(".json")]
+        if len(entries) > self.max_entries:
+            entries.sort(key=self._mtime)
+            for path in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached report for ``key``, or None if missing or expired."""
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def put(self, key: str, topic: str, report: str):
+        """Cache ``report`` under ``key`` and evict the least recently used entries."""
+        await asyncio.to_thread(self._put_sync, key, topic, report)
+
+    async def get_or_create(self, key: str, topic: str, create: Callable[[], Awaitable[str]],
+                            keep: Optional[Callable[[str], bool]] = None, timeout: Optional[float] = None) -> str:
+        """Return the cached report for ``key``, generating it at most once at a time.
+
+        Args:
+            key: Cache key from ``cache_key``
+            topic: Topic of the report, stored alongside it
+            create: Coroutine function generating the report on a miss
+            keep: Called with a generated report; returning False serves it to
+                concurrent requests without storing it
+            timeout: Seconds this request may wait for a generation another
+                request started, None to wait until it finishes
+
+        Returns:
+            The cached or freshly generated report
+
+        Raises:
+            TimeoutError: If the generation this request joined did not finish within ``timeout``
+        """
+        deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+        while True:
+            # Join a generation already running for this key
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                try:
+                    wait = None if deadline is None else max(deadline - asyncio.get_running_loop().time(), 0)
+                    report = await asyncio.wait_for(asyncio.shield(in_flight), wait)
+                except asyncio.TimeoutError:
+                    # The generation goes on for the requests that can wait for it
+                    raise TimeoutError(f"Gave up after {timeout:g} s waiting for the report on '{topic}' "
+                                       "another request is generating") from None
+                except _GenerationAbandoned:
+                    # The request generating it was cancelled: look again and take over if needed
+                    continue
+                self.hits += 1
+                CACHE_HITS.inc(source="in_flight")
+                return report
+
+            try:
+                report = await self.get(key)
+            except Exception as e:
+                # A cache that cannot be read is a miss, never a failed report
+                logger.error(f"Failed to read cached report for '{topic}': {str(e)}")
+                report = None
+            if report is not None:
+                self.hits += 1
+                CACHE_HITS.inc(source="disk")
+                logger.info(f"Report cache hit for '{topic}'")
+                return report
+
+            # Another request may have started generating while we read the disk
+            if key not in self._in_flight:
+                break
+
+        self.misses += 1
+        CACHE_MISSES.inc()
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            report = await create()
+            future.set_result(report)
+            if keep is None or keep(report):
+                try:
+                    await self.put(key, topic, report)
+                except Exception as e:
+                    # The report is still good; only the next request has to generate it again
+                    logger.error(f"Failed to cache report for '{topic}': {str(e)}")
+            return report
+        except asyncio.CancelledError:
+            if not future.done():
+                # Waiters must not be cancelled with this caller; one of them takes over
+                future.set_exception(_GenerationAbandoned(key))
+                future.exception()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Waiters re-raise the error; mark it retrieved for this caller
+                future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
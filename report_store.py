@@ -0,0 +1,200 @@
+import os
+import re
+import gzip
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_ID_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+@dataclass
+class StoredReport:
+    """Metadata of a report kept in the store."""
+    report_id: str
+    content_hash: str
+    path: str
+    created_at: float
+    size: int
+    topic: Optional[str] = None
+
+def atomic_write(path: str, data: bytes):
+    """Write ``data`` to ``path`` so readers never see a partial file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class ReportStore:
+    """Content-addressed, concurrency-safe storage for finished reports.
+
+    Report bodies are stored once per content hash under ``objects/`` and
+    every request gets a small index entry under ``index/`` pointing at its
+    body, so concurrent requests never overwrite each other and identical
+    reports share a file. All file I/O runs in worker threads and every file
+    is written atomically.
+
+    Args:
+        root: Directory holding the store
+        compress: Whether to gzip report bodies
+        max_age_seconds: Drop reports older than this on eviction
+        max_reports: Keep at most this many reports, evicting the oldest first
+    """
+
+    def __init__(self, root: str, compress: bool = False, max_age_seconds: Optional[float] = None,
+                 max_reports: Optional[int] = None):
+        self.root = root
+        self.compress = compress
+        self.max_age_seconds = max_age_seconds
+        self.max_reports = max_reports
+        # Saves and evictions exclude each other, so eviction never removes a body a new index entry points at
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ReportStore":
+        """Build a store from the REPORT_STORE_* environment variables."""
+        max_age_hours = os.getenv("REPORT_STORE_MAX_AGE_HOURS")
+        max_reports = os.getenv("REPORT_STORE_MAX_REPORTS")
+        return cls(
+            root=os.getenv("REPORT_STORE_DIR", os.path.join(os.getcwd(), "temp", "reports")),
+            compress=os.getenv("REPORT_STORE_COMPRESS", "false").lower() in ("1", "true", "yes"),
+            max_age_seconds=float(max_age_hours) * 3600 if max_age_hours else None,
+            max_reports=int(max_reports) if max_reports else None,
+        )
+
+    @staticmethod
+    def new_report_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def normalize_id(report_id: str) -> str:
+        """Make a request or thread ID safe to use as a file name."""
+        return _UNSAFE_ID_CHARS.sub("_", report_id)[:128]
+
+    def _object_path(self, content_hash: str, compressed: bool) -> str:
+        suffix = ".md.gz" if compressed else ".md"
+        return os.path.join(self.root, "objects", content_hash[:2], content_hash + suffix)
+
+    def _index_path(self, report_id: str) -> str:
+        return os.path.join(self.root, "index", self.normalize_id(report_id) + ".json")
+
+    def _save_sync(self, report: str, report_id: str, topic: Optional[str]) -> StoredReport:
+        body = report.encode("utf-8")
+        content_hash = hashlib.sha256(body).hexdigest()
+        path = self._object_path(content_hash, self.compress)
+
+        # Identical content is only written once
+        if not os.path.exists(path):
+            atomic_write(path, gzip.compress(body) if self.compress else body)
+
+        stored = StoredReport(
+            report_id=self.normalize_id(report_id),
+            content_hash=content_hash,
+            path=path,
+            created_at=time.time(),
+            size=len(body),
+            topic=topic,
+        )
+        atomic_write(self._index_path(report_id), json.dumps(asdict(stored)).encode("utf-8"))
+        return stored
+
+    def _find_sync(self, report_id: str) -> Optional[StoredReport]:
+        try:
+            with open(self._index_path(report_id), "r", encoding="utf-8") as f:
+                stored = StoredReport(**json.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+        return stored if os.path.exists(stored.path) else None
+
+    def _read_sync(self, stored: StoredReport) -> Optional[str]:
+        try:
+            with open(stored.path, "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        if stored.path.endswith(".gz"):
+            body = gzip.decompress(body)
+        return body.decode("utf-8")
+
+    def _list_sync(self) -> List[StoredReport]:
+        index_dir = os.path.join(self.root, "index")
+        if not os.path.isdir(index_dir):
+            return []
+        reports = []
+        for name in os.listdir(index_dir):
+            if name.endswith(".json"):
+                stored = self._find_sync(name[:-len(".json")])
+                if stored:
+                    reports.append(stored)
+        return sorted(reports, key=lambda r: r.created_at)
+
+    def _evict_sync(self) -> int:
+        reports = self._list_sync()
+        now = time.time()
+        expired = []
+        if self.max_age_seconds is not None:
+            expired = [r for r in reports if now - r.created_at > self.max_age_seconds]
+        kept = [r for r in reports if r not in expired]
+        if self.max_reports is not None and len(kept) > self.max_reports:
+            expired.extend(kept[:len(kept) - self.max_reports])
+            kept = kept[len(kept) - self.max_reports:]
+
+        for stored in expired:
+            try:
+                os.remove(self._index_path(stored.report_id))
+            except FileNotFoundError:
+                pass
+
+        # Remove bodies no remaining report points at
+        referenced = {r.path for r in kept}
+        for stored in expired:
+            if stored.path not in referenced and os.path.exists(stored.path):
+                os.remove(stored.path)
+        return len(expired)
+
+    async def save(self, report: str, report_id: Optional[str] = None, topic: Optional[str] = None) -> StoredReport:
+        """Store a report under ``report_id`` (a new ID if omitted) and apply the retention policy."""
+        async with self._lock:
+            stored = await asyncio.to_thread(self._save_sync, report, report_id or self.new_report_id(), topic)
+        if self.max_age_seconds is not None or self.max_reports is not None:
+            await self.evict()
+        return stored
+
+    async def find(self, report_id: str) -> Optional[StoredReport]:
+        """Return the metadata of a stored report, or None if it is unknown or evicted."""
+        return await asyncio.to_thread(self._find_sync, report_id)
+
+    async def fetch(self, report_id: str) -> Optional[Tuple[StoredReport, str]]:
+        """Return the metadata and content of a stored report, or None if it is unknown or evicted."""
+        stored = await self.find(report_id)
+        if stored is None:
+            return None
+        content = await asyncio.to_thread(self._read_sync, stored)
+        return (stored, content) if content is not None else None
+
+    async def get(self, report_id: str) -> Optional[str]:
+        """Return the content of a stored report, or None if it is unknown or evicted."""
+        found = await self.fetch(report_id)
+        return found[1] if found else None
+
+    async def evict(self) -> int:
+        """Apply the retention policy and return the number of reports removed."""
+        async with self._lock:
+            removed = await asyncio.to_thread(self._evict_sync)
+        if removed:
+            logger.info(f"Evicted {removed} report(s) from {self.root}")
+        return removed
@@ -0,0 +1,283 @@
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from langgraph.checkpoint.memory import MemorySaver
+
+logger = logging.getLogger(__name__)
+
+def _typed_size(value) -> int:
+    """Size in bytes of a ``(type, bytes)`` pair produced by ``serde.dumps_typed``."""
+    return len(value[1]) if value and value[1] else 0
+
+class BoundedMemorySaver(MemorySaver):
+    """In-memory checkpointer that keeps only the latest checkpoints of each thread.
+
+    Resuming a run only needs its latest checkpoint and the pending writes
+    on it, but ``MemorySaver`` keeps every superstep, including each
+    version of large channels such as ``source_str``, until the thread is
+    deleted. This saver keeps ``max_history`` checkpoints per thread and
+    namespace, drops the writes of older ones and frees channel values no
+    retained checkpoint refers to. It also tracks the serialized size of
+    each thread.
+
+    Args:
+        max_history: Number of checkpoints kept per thread and namespace
+    """
+
+    def __init__(self, max_history: int = 2, **kwargs):
+        super().__init__(**kwargs)
+        if max_history < 1:
+            raise ValueError("At least the latest checkpoint has to be kept")
+        self.max_history = max_history
+        # Channel versions each checkpoint refers to and blob keys per thread/namespace
+        self._versions: Dict[Tuple[str, str, str], Dict[str, object]] = {}
+        self._blob_keys: Dict[Tuple[str, str], Set[Tuple[str, object]]] = defaultdict(set)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        self._versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+        self._blob_keys[(thread_id, checkpoint_ns)].update(new_versions.items())
+        self._trim(thread_id, checkpoint_ns)
+        return saved
+
+    def _trim(self, thread_id: str, checkpoint_ns: str):
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_history:
+            return
+        # Checkpoint IDs are time-ordered
+        ordered = sorted(checkpoints)
+        for checkpoint_id in ordered[:-self.max_history]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+        referenced = set()
+        for checkpoint_id in ordered[-self.max_history:]:
+            referenced.update(self._versions.get((thread_id, checkpoint_ns, checkpoint_id), {}).items())
+        blob_keys = self._blob_keys[(thread_id, checkpoint_ns)]
+        for channel, version in blob_keys - referenced:
+            self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+        blob_keys &= referenced
+
+    def thread_size(self, thread_id: str) -> int:
+        """Bytes of serialized checkpoints, writes and channel values retained for ``thread_id``."""
+        size = 0
+        for checkpoint_ns, checkpoints in self.storage.get(thread_id, {}).items():
+            for checkpoint_id, (checkpoint, metadata, _) in checkpoints.items():
+                size += _typed_size(checkpoint) + _typed_size(metadata)
+                for write in self.writes.get((thread_id, checkpoint_ns, checkpoint_id), {}).values():
+                    size += _typed_size(write[2])
+            for channel, version in self._blob_keys.get((thread_id, checkpoint_ns), ()):
+                size += _typed_size(self.blobs.get((thread_id, checkpoint_ns, channel, version)))
+        return size
+
+    def total_size(self) -> int:
+        """Bytes retained for all threads."""
+        return sum(self.thread_size(thread_id) for thread_id in list(self.storage))
+
+    def delete_thread(self, thread_id: str) -> None:
+        # Only visit this thread's keys instead of every write and blob
+        for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+            for checkpoint_id in checkpoints:
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            for channel, version in self._blob_keys.pop((thread_id, checkpoint_ns), ()):
+                self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+class DurableCheckpoints:
+    """SQLite-backed checkpoints so interrupted reports resume instead of restarting.
+
+    Wraps LangGraph's ``AsyncSqliteSaver`` (the optional
+    ``langgraph-checkpoint-sqlite`` package) and keeps a small
+    ``research_runs`` table next to the checkpoints recording the topic and
+    last activity of every unfinished run. A run's thread is deleted once
+    its report is extracted; threads left behind by runs that were never
+    resumed are pruned by age and by total checkpoint size.
+
+    Args:
+        path: SQLite database file
+        max_age_seconds: Prune unfinished runs idle for longer than this
+        max_bytes: Prune the oldest runs while checkpoints take more than this
+        prune_interval: Seconds between automatic prunes
+        max_history: Checkpoints kept per thread and namespace by ``trim``
+    """
+
+    def __init__(self, path: str, max_age_seconds: Optional[float] = 24 * 3600, max_bytes: Optional[int] = 512 * 1024 * 1024,
+                 prune_interval: float = 3600, max_history: int = 2):
+        self.path = path
+        self.max_history = max_history
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self._saver = None
+        self._setup_lock = asyncio.Lock()
+        self._thread_locks: Dict[str, asyncio.Lock] = {}
+        self._last_prune = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional["DurableCheckpoints"]:
+        """Build durable checkpoints from the RESEARCH_CHECKPOINT_* environment variables, or None if disabled."""
+        path = os.getenv("RESEARCH_CHECKPOINT_DB")
+        if not path:
+            return None
+        max_age_hours = os.getenv("RESEARCH_CHECKPOINT_MAX_AGE_HOURS", "24")
+        max_mb = os.getenv("RESEARCH_CHECKPOINT_MAX_MB", "512")
+        return cls(
+            path=path,
+            max_age_seconds=float(max_age_hours) * 3600 if max_age_hours else None,
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else None,
+            max_history=int(os.getenv("RESEARCH_CHECKPOINT_HISTORY", "2")),
+        )
+
+    async def saver(self):
+        """Open the database on first use and return the checkpointer."""
+        async with self._setup_lock:
+            if self._saver is None:
+                try:
+                    import aiosqlite
+                    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+                except ImportError as e:
+                    raise ImportError("Durable checkpoints need the langgraph-checkpoint-sqlite package: "
+                                      "pip install langgraph-checkpoint-sqlite") from e
+
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                conn = await aiosqlite.connect(self.path)
+                saver = AsyncSqliteSaver(conn)
+                try:
+                    await saver.setup()
+                    async with saver.lock:
+                        await conn.execute(
+                            "CREATE TABLE IF NOT EXISTS research_runs ("
+                            "thread_id TEXT PRIMARY KEY, topic TEXT NOT NULL, started_at REAL NOT NULL, updated_at REAL NOT NULL)"
+                        )
+                        await conn.commit()
+                except BaseException:
+                    # The connection's worker thread would keep the process alive
+                    await conn.close()
+                    raise
+                self._saver = saver
+                logger.info(f"Using durable research checkpoints in {self.path}")
+        if time.time() - self._last_prune > self.prune_interval:
+            await self.prune()
+        return self._saver
+
+    def thread_lock(self, thread_id: str) -> asyncio.Lock:
+        """Lock serializing runs of the same thread, which would otherwise overwrite each other's checkpoints."""
+        return self._thread_locks.setdefault(thread_id, asyncio.Lock())
+
+    async def start(self, thread_id: str, topic: str):
+        """Record that a run of ``topic`` is in progress on ``thread_id``."""
+        saver = await self.saver()
+        now = time.time()
+        async with saver.lock:
+            await saver.conn.execute(
+                "INSERT INTO research_runs (thread_id, topic, started_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (thread_id, topic, now, now),
+            )
+            await saver.conn.commit()
+
+    async def trim(self, thread_id: str):
+        """Delete all but the latest ``max_history`` checkpoints of a thread, with their writes, and record the activity."""
+        saver = await self.saver()
+        async with saver.lock:
+            await saver.conn.execute("UPDATE research_runs SET updated_at = ? WHERE thread_id = ?", (time.time(), thread_id))
+            await saver.conn.execute(
+                "DELETE FROM checkpoints WHERE rowid IN (SELECT rowid FROM ("
+                "SELECT rowid, ROW_NUMBER() OVER (PARTITION BY checkpoint_ns ORDER BY checkpoint_id DESC) AS position "
+                "FROM checkpoints WHERE thread_id = ?) WHERE position > ?)",
+                (thread_id, self.max_history),
+            )
+            await saver.conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND NOT EXISTS (SELECT 1 FROM checkpoints c WHERE "
+                "c.thread_id = writes.thread_id AND c.checkpoint_ns = writes.checkpoint_ns AND c.checkpoint_id = writes.checkpoint_id)",
+                (thread_id,),
+            )
+            await saver.conn.commit()
+
+    async def thread_size(self, thread_id: str) -> int:
+        """Bytes of checkpoints and writes stored for ``thread_id``."""
+        saver = await self.saver()
+        async with saver.lock:
+            async with saver.conn.execute(
+                "SELECT COALESCE((SELECT SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints WHERE thread_id = ?), 0) + "
+                "COALESCE((SELECT SUM(LENGTH(value)) FROM writes WHERE thread_id = ?), 0)",
+                (thread_id, thread_id),
+            ) as cursor:
+                return (await cursor.fetchone())[0]
+
+    async def finish(self, thread_id: str):
+        """Delete the checkpoints of a finished run."""
+        saver = await self.saver()
+        await saver.adelete_thread(thread_id)
+        async with saver.lock:
+            await saver.conn.execute("DELETE FROM research_runs WHERE thread_id = ?", (thread_id,))
+            await saver.conn.commit()
+        self._thread_locks.pop(thread_id, None)
+
+    async def incomplete_runs(self) -> List[Tuple[str, str]]:
+        """Return ``(thread_id, topic)`` of every unfinished run, oldest first."""
+        saver = await self.saver()
+        async with saver.lock:
+            async with saver.conn.execute("SELECT thread_id, topic FROM research_runs ORDER BY started_at") as cursor:
+                return [(row[0], row[1]) for row in await cursor.fetchall()]
+
+    async def prune(self) -> int:
+        """Delete runs idle for too long, then the least recently active runs while over the size limit.
+
+        Runs in progress, whose thread lock is held, are never deleted.
+
+        Returns:
+            The number of runs removed
+        """
+        self._last_prune = time.time()
+        saver = await self.saver()
+        async with saver.lock:
+            async with saver.conn.execute(
+                "SELECT r.thread_id, r.updated_at, "
+                "COALESCE((SELECT SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints c WHERE c.thread_id = r.thread_id), 0) + "
+                "COALESCE((SELECT SUM(LENGTH(value)) FROM writes w WHERE w.thread_id = r.thread_id), 0) "
+                "FROM research_runs r ORDER BY r.updated_at"
+            ) as cursor:
+                runs = await cursor.fetchall()
+
+        now = time.time()
+        active = {thread_id for thread_id, lock in self._thread_locks.items() if lock.locked()}
+        expired = set()
+        if self.max_age_seconds is not None:
+            expired = {thread_id for thread_id, updated_at, _ in runs
+                       if now - updated_at > self.max_age_seconds and thread_id not in active}
+        if self.max_bytes is not None:
+            total = sum(size for thread_id, _, size in runs if thread_id not in expired)
+            for thread_id, _, size in runs:
+                if total <= self.max_bytes:
+                    break
+                if thread_id not in expired and thread_id not in active:
+                    expired.add(thread_id)
+                    total -= size
+
+        for thread_id in list(expired):
+            lock = self.thread_lock(thread_id)
+            if lock.locked():
+                # A run started on this thread meanwhile
+                expired.discard(thread_id)
+                continue
+            async with lock:
+                await self.finish(thread_id)
+        if expired:
+            async with saver.lock:
+                await saver.conn.execute("VACUUM")
+            logger.info(f"Pruned {len(expired)} research run(s) from {self.path}")
+        return len(expired)
+
+    async def close(self):
+        if self._saver is not None:
+            await self._saver.conn.close()
+            self._saver = None
@@ -0,0 +1,89 @@
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+
+from mentions import Mention, PRIORITY_NORMAL, PRIORITY_LEVELS
+
+class FairScheduler:
+    """Admission control and per-sender fair queuing for research mentions.
+
+    Admitted mentions wait in one FIFO per sender. ``get`` serves the highest
+    priority level that has work and, within a level, takes one mention from
+    each sender in turn, so a sender that posts many mentions at once cannot
+    hold every worker while others wait. ``offer`` never blocks: a mention is
+    rejected when the scheduler holds ``max_depth`` mentions or its sender
+    already has ``max_per_sender`` waiting, and the caller answers it right
+    away with ``retry_after``.
+
+    Args:
+        max_depth: Maximum number of admitted mentions waiting for a worker
+        max_per_sender: Maximum number of waiting mentions from one sender
+        workers: Number of workers draining the scheduler, used to estimate waits
+        default_duration: Assumed seconds per mention until one has finished
+    """
+
+    def __init__(self, max_depth: int = 16, max_per_sender: Optional[int] = None, workers: int = 1,
+                 default_duration: float = 120):
+        if max_depth < 1:
+            raise ValueError("The mention queue needs room for at least one mention")
+        self.max_depth = max_depth
+        self.max_per_sender = max_per_sender or max_depth
+        self.workers = workers
+        self.average_duration = default_duration
+        self.rejected = 0
+        self._levels: List["OrderedDict[str, Deque[Tuple[Mention, float]]]"] = [OrderedDict() for _ in PRIORITY_LEVELS]
+        self._depth = 0
+        self.in_flight = 0
+        self._available = asyncio.Condition()
+
+    def qsize(self) -> int:
+        return self._depth
+
+    def sender_depth(self, sender_id: str) -> int:
+        return sum(len(level.get(sender_id, ())) for level in self._levels)
+
+    def retry_after(self) -> int:
+        """Estimate in seconds until a newly offered mention would be admitted."""
+        backlog = self._depth + self.in_flight
+        return max(5, math.ceil(self.average_duration * backlog / self.workers))
+
+    async def offer(self, mention: Mention, priority: int = PRIORITY_NORMAL) -> bool:
+        """Admit ``mention`` at ``priority`` or return False if the scheduler is saturated."""
+        if self._depth >= self.max_depth or self.sender_depth(mention.sender_id) >= self.max_per_sender:
+            self.rejected += 1
+            return False
+        async with self._available:
+            self._levels[priority].setdefault(mention.sender_id, deque()).append((mention, time.monotonic()))
+            self._depth += 1
+            self._available.notify()
+        return True
+
+    def _pop(self) -> Tuple[Mention, float]:
+        level = next(level for level in self._levels if level)
+        sender_id, mentions = level.popitem(last=False)
+        entry = mentions.popleft()
+        # The sender goes to the back of the rotation if it has more waiting
+        if mentions:
+            level[sender_id] = mentions
+        self._depth -= 1
+        return entry
+
+    async def get(self) -> Tuple[Mention, float]:
+        """Wait for the next mention in priority and round-robin order and mark it in flight.
+
+        Returns:
+            The mention and the seconds it waited in the scheduler
+        """
+        async with self._available:
+            await self._available.wait_for(lambda: self._depth > 0)
+            mention, admitted_at = self._pop()
+        self.in_flight += 1
+        return mention, time.monotonic() - admitted_at
+
+    def done(self, duration: float):
+        """Record that an in-flight mention finished after ``duration`` seconds."""
+        self.in_flight -= 1
+        # Exponential moving average keeps retry hints close to recent reports
+        self.average_duration = 0.8 * self.average_duration + 0.2 * duration
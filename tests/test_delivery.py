@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from coral_session import CoralTransportError
+from delivery import deliver_report, split_report
+
+
+class FlakySendMessage:
+    """Records sent messages and fails once, on the ``fail_at``-th call."""
+
+    def __init__(self, fail_at: int):
+        self.fail_at = fail_at
+        self.calls = 0
+        self.sent = []
+
+    async def ainvoke(self, args):
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise CoralTransportError("connection lost")
+        self.sent.append(args["content"])
+
+
+REPORT = "# Title\n\n" + "\n\n".join(f"## Section {i}\n\n" + f"word{i} " * 150 for i in range(6))
+
+
+def test_retried_delivery_resumes_after_sent_parts():
+    send_message = FlakySendMessage(fail_at=3)
+
+    async def deliver():
+        return await deliver_report(send_message, "thread-1", "alice", REPORT, "/reports/r.md", mode="chunks", max_chars=1200)
+
+    with pytest.raises(CoralTransportError):
+        asyncio.run(deliver())
+    assert len(send_message.sent) == 2
+
+    count = asyncio.run(deliver())
+
+    assert len(send_message.sent) == count
+    assert [message.split("]", 1)[0] for message in send_message.sent] == [f"[Report part {i}/{count}" for i in range(1, count + 1)]
+
+
+def test_split_report_keeps_headings_with_their_text():
+    chunks = split_report("# Title\n\n## Long\n\n" + "lorem ipsum " * 200, 300)
+
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert chunks[0].startswith("# Title\n\n## Long\n\nlorem")
+    assert all(not chunk.splitlines()[-1].startswith("#") for chunk in chunks)
+    assert all(word in ("lorem", "ipsum", "#", "##", "Title", "Long") for chunk in chunks for word in chunk.split())
@@ -0,0 +1,26 @@
+from mentions import extract_topic, parse_mentions
+
+
+def test_parse_mentions_keeps_content_with_greater_than_sign():
+    raw = ('<messages><ResolvedMessage id="m1" threadId="t1" senderId="alice" '
+           'content="is A > B better for &quot;caching&quot;?" mentions="odr"/></messages>')
+
+    mentions = parse_mentions(raw)
+
+    assert len(mentions) == 1
+    assert mentions[0].content == 'is A > B better for "caching"?'
+    assert (mentions[0].thread_id, mentions[0].sender_id, mentions[0].request_id) == ("t1", "alice", "t1-m1")
+
+
+def test_parse_mentions_reads_every_element():
+    raw = ('<ResolvedMessage threadId="t1" senderId="a" content="x > y"/>\n'
+           '<ResolvedMessage threadId="t2" senderId="b" content="quantum computing">')
+
+    assert [m.content for m in parse_mentions(raw)] == ["x > y", "quantum computing"]
+
+
+def test_extract_topic_strips_request_prefixes():
+    assert extract_topic("@odr Write me a detailed report on solid-state batteries.") == "solid-state batteries"
+    assert extract_topic("report on the EU AI Act") == "the EU AI Act"
+    assert extract_topic("[priority: high] Research report about quantum computing") == "quantum computing"
+    assert extract_topic("Is A > B better?") == "Is A > B better?"
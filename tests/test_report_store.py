@@ -0,0 +1,29 @@
+import time
+import asyncio
+
+import report_store
+from report_store import ReportStore
+
+
+def test_eviction_keeps_body_of_report_saved_meanwhile(tmp_path, monkeypatch):
+    write = report_store.atomic_write
+
+    def slow_index_write(path, data):
+        # Widen the gap between the save finding the body on disk and indexing it
+        if "index" in path:
+            time.sleep(0.2)
+        write(path, data)
+
+    async def scenario():
+        store = ReportStore(root=str(tmp_path), max_age_seconds=0.5)
+        await store.save("same report", report_id="old")
+        await asyncio.sleep(0.6)
+        monkeypatch.setattr(report_store, "atomic_write", slow_index_write)
+        # The new report shares the expired report's body
+        save = asyncio.create_task(store.save("same report", report_id="new"))
+        await asyncio.sleep(0.05)
+        await store.evict()
+        await save
+        return await store.get("new"), await store.get("old")
+
+    assert asyncio.run(scenario()) == ("same report", None)
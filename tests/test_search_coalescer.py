@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from open_deep_research.utils import SearchCoalescer
+
+
+def test_waiter_runs_query_when_owner_is_cancelled():
+    async def scenario():
+        coalescer = SearchCoalescer()
+        calls = []
+
+        async def execute(queries):
+            calls.append(queries)
+            await asyncio.sleep(0.05)
+            return [{"query": query, "results": []} for query in queries]
+
+        owner = asyncio.create_task(coalescer.search("tavily", ["shared query"], {}, execute))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(coalescer.search("tavily", ["Shared  query"], {}, execute))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return await waiter, calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == [{"query": "Shared  query", "results": []}]
+    assert calls == [["shared query"], ["Shared  query"]]
+
+
+def test_waiter_shares_owner_failure():
+    async def scenario():
+        coalescer = SearchCoalescer()
+
+        async def execute(queries):
+            await asyncio.sleep(0.02)
+            raise RuntimeError("backend down")
+
+        return await asyncio.gather(coalescer.search("tavily", ["q"], {}, execute),
+                                    coalescer.search("tavily", ["q"], {}, execute), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_concurrent_runs_execute_each_query_once():
+    async def scenario():
+        coalescer = SearchCoalescer()
+        calls = []
+
+        async def execute(queries):
+            calls.append(queries)
+            await asyncio.sleep(0.01)
+            return [{"query": query, "results": []} for query in queries]
+
+        await asyncio.gather(coalescer.search("tavily", ["a", "b"], {}, execute),
+                             coalescer.search("tavily", ["b", "c"], {}, execute))
+        return coalescer, calls
+
+    coalescer, calls = asyncio.run(scenario())
+    assert sorted(query for batch in calls for query in batch) == ["a", "b", "c"]
+    assert (coalescer.requested, coalescer.executed) == (4, 3)
@@ -0,0 +1,171 @@
+import time
+import asyncio
+import logging
+import traceback
+from typing import Awaitable, Callable, List, Optional
+
+from coral_session import CoralSession, is_coral_disconnect, is_transport_error
+from mentions import Mention, extract_priority, parse_mentions
+from scheduler import FairScheduler
+from open_deep_research.metrics import REGISTRY, REPORT_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+MENTIONS_IN_FLIGHT = REGISTRY.gauge("odr_mentions_in_flight", "Mentions currently handled by a worker.")
+QUEUE_DEPTH = REGISTRY.gauge("odr_mention_queue_depth", "Admitted mentions waiting for a worker.")
+MENTIONS_RECEIVED = REGISTRY.counter("odr_mentions_received_total", "Mentions received from Coral.")
+MENTIONS_REJECTED = REGISTRY.counter("odr_mentions_rejected_total", "Mentions answered with a busy reply.")
+MENTION_WAIT_SECONDS = REGISTRY.histogram("odr_mention_queue_wait_seconds", "Time admitted mentions waited for a worker.",
+                                          buckets=REPORT_BUCKETS)
+MENTION_SECONDS = REGISTRY.histogram("odr_mention_duration_seconds", "End-to-end time from admitting a mention to finishing it, by outcome.",
+                                     buckets=REPORT_BUCKETS)
+
+MentionHandler = Callable[[Mention], Awaitable[None]]
+RejectHandler = Callable[[Mention, int], Awaitable[None]]
+
+class ResearchWorkerPool:
+    """Serve Coral mentions with a fixed number of concurrent research workers.
+
+    A single receiver keeps calling ``wait_for_mentions`` and offers every
+    mention to a ``FairScheduler``, which orders waiting mentions by their
+    priority hint and round-robin across senders. Each worker owns its own
+    handler (built by ``handler_factory``), so an agent scratchpad or a
+    failing report in one worker never leaks into another. When the
+    scheduler is saturated the mention is passed to ``on_reject`` with a
+    retry hint in seconds, so the sender hears back at once instead of
+    waiting for a timeout.
+
+    Args:
+        wait_for_mentions: The Coral ``wait_for_mentions`` tool
+        handler_factory: Called once per worker to build its mention handler
+        workers: Number of concurrent research workers
+        queue_size: Maximum number of received mentions waiting for a worker
+        sender_queue_size: Maximum number of waiting mentions from one sender
+        on_reject: Coroutine answering a mention the scheduler did not admit
+        wait_timeout_ms: Timeout passed to ``wait_for_mentions``
+        session: Coral session to wait on when the connection drops
+        transport_retries: How often a mention is retried after the Coral
+            connection failed while handling it
+    """
+
+    def __init__(
+        self,
+        wait_for_mentions,
+        handler_factory: Callable[[int], Awaitable[MentionHandler]],
+        workers: int = 2,
+        queue_size: int = 16,
+        sender_queue_size: Optional[int] = None,
+        on_reject: Optional[RejectHandler] = None,
+        wait_timeout_ms: int = 30000,
+        session: Optional[CoralSession] = None,
+        transport_retries: int = 2,
+    ):
+        if workers < 1:
+            raise ValueError("A research worker pool needs at least one worker")
+        self.wait_for_mentions = wait_for_mentions
+        self.handler_factory = handler_factory
+        self.workers = workers
+        self.wait_timeout_ms = wait_timeout_ms
+        self.session = session
+        self.transport_retries = transport_retries
+        self.on_reject = on_reject
+        self.scheduler = FairScheduler(max_depth=queue_size, max_per_sender=sender_queue_size, workers=workers)
+        MENTIONS_IN_FLIGHT.set_function(lambda: self.scheduler.in_flight)
+        QUEUE_DEPTH.set_function(self.scheduler.qsize)
+        self._tasks: List[asyncio.Task] = []
+
+    async def receive(self):
+        """Pull mentions from Coral and enqueue them for the workers."""
+        while True:
+            try:
+                raw = await self.wait_for_mentions.ainvoke({"timeoutMs": self.wait_timeout_ms})
+            except Exception as e:
+                # wait_for_mentions only talks to Coral, so any transport failure is a disconnect
+                if is_transport_error(e):
+                    logger.warning(f"Coral connection lost while waiting for mentions: {str(e)}")
+                    await self._wait_for_connection()
+                else:
+                    logger.error(f"Error waiting for mentions: {str(e)}")
+                    logger.error(traceback.format_exc())
+                    await asyncio.sleep(5)
+                continue
+
+            for mention in parse_mentions(raw):
+                await self.admit(mention)
+
+    async def admit(self, mention: Mention):
+        """Queue ``mention`` for a worker or answer it right away if the scheduler is saturated."""
+        MENTIONS_RECEIVED.inc()
+        mention.admitted_at = time.monotonic()
+        priority = extract_priority(mention.content)
+        if await self.scheduler.offer(mention, priority):
+            logger.info(f"Queued mention from {mention.sender_id} in thread {mention.thread_id} with priority {priority} "
+                        f"(queue depth {self.scheduler.qsize()}/{self.scheduler.max_depth})")
+            return
+
+        MENTIONS_REJECTED.inc()
+        retry_after = self.scheduler.retry_after()
+        logger.warning(f"Rejected mention from {mention.sender_id} in thread {mention.thread_id}, "
+                       f"queue saturated (retry after {retry_after}s)")
+        if self.on_reject is None:
+            return
+        try:
+            await self.on_reject(mention, retry_after)
+        except Exception as e:
+            logger.error(f"Failed to answer rejected mention from {mention.sender_id}: {str(e)}")
+
+    async def _wait_for_connection(self):
+        if self.session is not None:
+            await self.session.wait_ready()
+        else:
+            await asyncio.sleep(5)
+
+    async def _handle(self, worker_id: int, handler: MentionHandler, mention: Mention) -> str:
+        """Run ``handler`` on a mention, retrying it when only the Coral connection failed.
+
+        Returns:
+            The outcome: "ok", "error" or "disconnected"
+        """
+        for attempt in range(self.transport_retries + 1):
+            try:
+                logger.info(f"Worker {worker_id} handling mention from {mention.sender_id} in thread {mention.thread_id}")
+                await handler(mention)
+                logger.info(f"Worker {worker_id} finished mention from {mention.sender_id}")
+                return "ok"
+            except Exception as e:
+                if not is_coral_disconnect(e):
+                    logger.error(f"Worker {worker_id} failed on mention from {mention.sender_id}: {str(e)}")
+                    logger.error(traceback.format_exc())
+                    return "error"
+                if attempt == self.transport_retries:
+                    logger.error(f"Worker {worker_id} gave up on mention from {mention.sender_id} after {attempt + 1} connection failures")
+                    return "disconnected"
+                # Finished reports are served from the report cache on retry
+                logger.warning(f"Worker {worker_id} lost the Coral connection, retrying once reconnected: {str(e)}")
+                await self._wait_for_connection()
+
+    async def work(self, worker_id: int):
+        """Process queued mentions one at a time with this worker's own handler."""
+        handler = await self.handler_factory(worker_id)
+        while True:
+            mention, waited = await self.scheduler.get()
+            MENTION_WAIT_SECONDS.observe(waited)
+            started = time.monotonic()
+            outcome = "cancelled"
+            try:
+                outcome = await self._handle(worker_id, handler, mention)
+            finally:
+                duration = time.monotonic() - started
+                self.scheduler.done(duration)
+                MENTION_SECONDS.observe(waited + duration, outcome=outcome)
+
+    async def run(self):
+        """Start the receiver and all workers and run until cancelled."""
+        self._tasks = [asyncio.create_task(self.work(i), name=f"research-worker-{i}") for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self.receive(), name="mention-receiver"))
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)